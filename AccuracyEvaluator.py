@@ -0,0 +1,186 @@
+import os
+import csv
+import json
+import numpy as np
+from Point import PointSet
+from CoordinateConverter import CoordinateConverter
+
+class AccuracyReport:
+    """
+    Результат проверки калибровки по контрольным точкам: для каждой точки известные
+    и посчитанные глобальные координаты, отклонение и отношение отклонения к длине пикселя.
+    """
+    def __init__(self, local_coords, known_coords, computed_coords, width_pixel, num_ref_points, method, names=None):
+        self.local_coords = local_coords
+        self.known_coords = known_coords
+        self.computed_coords = computed_coords
+        self.width_pixel = width_pixel
+        self.num_ref_points = num_ref_points
+        self.method = method
+        self.names = names
+        self.errors = computed_coords - known_coords
+        self.deviations = np.linalg.norm(self.errors, axis=1)
+        self.ratios = AccuracyEvaluator.deviation_to_pixel_ratio(self.deviations, width_pixel)
+
+    def __len__(self):
+        return len(self.deviations)
+
+    def summary(self):
+        """
+        Сводная статистика по всем контрольным точкам. Точки, для которых координаты
+        не удалось посчитать (NaN), учитываются только в failed.
+        """
+        valid = np.flatnonzero(np.isfinite(self.deviations))
+        summary = {
+            "count": len(self),
+            "failed": len(self) - len(valid),
+            "method": self.method,
+            "num_ref_points": self.num_ref_points,
+            "width_pixel": float(self.width_pixel),
+        }
+        if len(valid) == 0:
+            return summary
+
+        deviations, ratios = self.deviations[valid], self.ratios[valid]
+        worst = int(valid[np.argmax(deviations)])
+        summary.update({
+            "mean_deviation": float(deviations.mean()),
+            "median_deviation": float(np.median(deviations)),
+            "rmse": float(np.sqrt(np.mean(deviations ** 2))),
+            "std_deviation": float(deviations.std()),
+            "p95_deviation": float(np.percentile(deviations, 95)),
+            "max_deviation": float(self.deviations[worst]),
+            "worst_checkpoint": self.names[worst] if self.names is not None else worst,
+            "mean_deviation_to_pixel_ratio": float(ratios.mean()),
+            "max_deviation_to_pixel_ratio": float(ratios.max()),
+            "bias": self.errors[valid].mean(axis=0).tolist(),
+        })
+        return summary
+
+    def rows(self):
+        """
+        Значения по каждой контрольной точке в виде словарей.
+        """
+        columns = zip(
+            self.names if self.names is not None else range(len(self)),
+            self.local_coords.tolist(), self.known_coords.tolist(), self.computed_coords.tolist(),
+            self.deviations.tolist(), self.ratios.tolist(),
+        )
+        return [
+            {
+                "name": name,
+                "local_coords": local,
+                "known_coords": known,
+                "computed_coords": computed,
+                "deviation": deviation,
+                "deviation_to_pixel_ratio": ratio,
+            }
+            for name, local, known, computed, deviation, ratio in columns
+        ]
+
+    def save(self, file_name):
+        """
+        Сохраняет отчёт: .csv - строка на каждую точку, иначе JSON со сводкой и точками.
+        """
+        if os.path.splitext(file_name)[1].lower() == ".csv":
+            with open(file_name, 'w', newline='', encoding='utf-8') as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(["name", "local_x", "local_y", "known_x", "known_y", "computed_x", "computed_y",
+                                 "deviation", "deviation_to_pixel_ratio"])
+                for row in self.rows():
+                    writer.writerow([row["name"], *row["local_coords"], *row["known_coords"], *row["computed_coords"],
+                                     row["deviation"], row["deviation_to_pixel_ratio"]])
+            return
+
+        with open(file_name, 'w', encoding='utf-8') as json_file:
+            json.dump({"summary": self.summary(), "checkpoints": self.rows()}, json_file, indent=4, ensure_ascii=False)
+
+class AccuracyEvaluator:
+    """
+    Пакетная проверка калибровки: все контрольные точки переводятся в глобальные
+    координаты одним вызовом и сравниваются с известными (те же метрики, что в AnalyticsWindow).
+    """
+    HOMOGRAPHY = "homography"
+    LINEAR = "linear"
+
+    def __init__(self, reference_points, method=HOMOGRAPHY):
+        if method not in (self.HOMOGRAPHY, self.LINEAR):
+            raise ValueError(f"Неизвестный способ перевода координат: {method}")
+        self.reference_points = reference_points
+        self.method = method
+
+    @staticmethod
+    def width_pixel(reference_points):
+        """
+        Средняя длина пикселя: отношение глобальных расстояний к локальным между соседними реперными точками.
+        """
+        ref_local_coords, ref_global_coords = CoordinateConverter.reference_arrays(reference_points)
+
+        local_distances = np.linalg.norm(ref_local_coords[1:] - ref_local_coords[:-1], axis=1)
+        global_distances = np.linalg.norm(ref_global_coords[1:] - ref_global_coords[:-1], axis=1)
+        pixel_lengths = global_distances / local_distances
+
+        return np.mean(pixel_lengths)
+
+    @staticmethod
+    def deviation(known_coords, computed_coords):
+        return np.linalg.norm(np.asarray(known_coords, dtype='float64') - np.asarray(computed_coords, dtype='float64'), axis=-1)
+
+    @staticmethod
+    def deviation_to_pixel_ratio(deviation, width_pixel):
+        if width_pixel == 0:
+            return np.zeros_like(deviation)
+        return deviation / width_pixel
+
+    def convert(self, local_coords):
+        if self.method == self.LINEAR:
+            return CoordinateConverter.simple_linear_many(self.reference_points, local_coords)
+        return CoordinateConverter.convert_many(self.reference_points, local_coords)
+
+    def evaluate(self, local_coords, known_coords, names=None):
+        """
+        Проверка по массивам локальных и известных глобальных координат формы (N, 2).
+        """
+        local_coords = np.asarray(local_coords, dtype='float64').reshape(-1, 2)
+        known_coords = np.asarray(known_coords, dtype='float64').reshape(-1, 2)
+        if len(local_coords) != len(known_coords):
+            raise ValueError("Число локальных и известных координат контрольных точек не совпадает")
+
+        computed_coords = self.convert(local_coords) if len(local_coords) else local_coords.copy()
+        num_ref_points = len(CoordinateConverter.reference_arrays(self.reference_points)[0])
+        return AccuracyReport(local_coords, known_coords, computed_coords, self.width_pixel(self.reference_points),
+                              num_ref_points, self.method, names)
+
+    def evaluate_points(self, checkpoints):
+        """
+        Проверка по набору точек, у которых global_coords - известные координаты.
+        """
+        checkpoints = PointSet.from_points(checkpoints)
+        if not checkpoints.has_global().all():
+            raise ValueError("У всех контрольных точек должны быть известные глобальные координаты")
+        return self.evaluate(checkpoints.local_coords, checkpoints.global_coords)
+
+    @staticmethod
+    def load_checkpoints(file_name):
+        """
+        Контрольные точки из CSV (столбцы local_x, local_y, global_x, global_y и необязательный name)
+        или из JSON формата Point.to_dict. Возвращает локальные координаты, известные координаты и имена.
+        """
+        if os.path.splitext(file_name)[1].lower() != ".csv":
+            checkpoints = PointSet.load_json(file_name)
+            if not checkpoints.has_global().all():
+                raise ValueError("У всех контрольных точек должны быть известные глобальные координаты")
+            return checkpoints.local_coords, checkpoints.global_coords, None
+
+        with open(file_name, 'r', newline='', encoding='utf-8') as csv_file:
+            records = list(csv.DictReader(csv_file))
+        try:
+            local_coords = np.array([(record["local_x"], record["local_y"]) for record in records], dtype='float64')
+            known_coords = np.array([(record["global_x"], record["global_y"]) for record in records], dtype='float64')
+        except KeyError as e:
+            raise ValueError(f"В файле контрольных точек нет столбца {e}")
+        names = [record["name"] for record in records] if records and "name" in records[0] else None
+        return local_coords.reshape(-1, 2), known_coords.reshape(-1, 2), names
+
+    def evaluate_file(self, file_name):
+        return self.evaluate(*self.load_checkpoints(file_name))
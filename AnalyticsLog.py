@@ -0,0 +1,282 @@
+"""
+Журнал анализов точности: одна строка JSON на анализ в analysis.jsonl, набор реперных точек
+хранится один раз в reference_sets.jsonl и упоминается в записях по хэшу.
+Записи только дописываются; чтение собирает журнал в столбцы numpy для выборок и агрегации.
+
+    python AnalyticsLog.py --by day
+    python AnalyticsLog.py --import-legacy logs
+"""
+import os
+import sys
+import glob
+import json
+import argparse
+from datetime import datetime
+import numpy as np
+from Point import PointSet
+from CoordinateConverter import CoordinateConverter, HomographyModel
+
+class AnalysisRecords:
+    """
+    Записи журнала в виде столбцов: time (datetime64), ref_set, num_ref_points, local_coords,
+    known_coords, computed_coords (N, 2), deviation, width_pixel, deviation_to_pixel_ratio.
+    """
+    COLUMNS = ("time", "ref_set", "num_ref_points", "local_coords", "known_coords", "computed_coords",
+               "deviation", "width_pixel", "deviation_to_pixel_ratio")
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    @classmethod
+    def from_records(cls, records):
+        def coords(key):
+            return np.array([record[key] for record in records], dtype=np.float64).reshape(-1, 2)
+
+        return cls({
+            "time": np.array([record["time"] for record in records], dtype="datetime64[s]"),
+            "ref_set": np.array([record["ref_set"] for record in records], dtype=object),
+            "num_ref_points": np.array([record["num_ref_points"] for record in records], dtype=np.int64),
+            "local_coords": coords("local_coords"),
+            "known_coords": coords("known_coords"),
+            "computed_coords": coords("computed_coords"),
+            "deviation": np.array([record["deviation"] for record in records], dtype=np.float64),
+            "width_pixel": np.array([record["width_pixel"] for record in records], dtype=np.float64),
+            "deviation_to_pixel_ratio": np.array([record["deviation_to_pixel_ratio"] for record in records], dtype=np.float64),
+        })
+
+    def __len__(self):
+        return len(self.columns["deviation"])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def subset(self, mask):
+        return AnalysisRecords({name: values[mask] for name, values in self.columns.items()})
+
+    def query(self, since=None, until=None, ref_set=None):
+        """
+        Записи в интервале [since, until) (datetime или строка ISO) и/или для одного набора реперных точек.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if since is not None:
+            mask &= self.columns["time"] >= np.datetime64(since, 's')
+        if until is not None:
+            mask &= self.columns["time"] < np.datetime64(until, 's')
+        if ref_set is not None:
+            mask &= self.columns["ref_set"] == ref_set
+        return self.subset(mask)
+
+    def group_keys(self, by):
+        if by == "day":
+            return self.columns["time"].astype("datetime64[D]").astype(str)
+        if by == "month":
+            return self.columns["time"].astype("datetime64[M]").astype(str)
+        if by == "ref_set":
+            return self.columns["ref_set"].astype(str)
+        raise ValueError(f"Неизвестная группировка: {by}")
+
+    def aggregate(self, by="day"):
+        """
+        Статистика отклонений по группам: by = "day", "month" или "ref_set".
+        """
+        if len(self) == 0:
+            return []
+        keys = self.group_keys(by)
+        groups, inverse = np.unique(keys, return_inverse=True)
+        result = []
+        for index, group in enumerate(groups):
+            mask = inverse == index
+            deviation = self.columns["deviation"][mask]
+            ratio = self.columns["deviation_to_pixel_ratio"][mask]
+            result.append({
+                by: str(group),
+                "count": int(mask.sum()),
+                "mean_deviation": float(deviation.mean()),
+                "median_deviation": float(np.median(deviation)),
+                "max_deviation": float(deviation.max()),
+                "mean_deviation_to_pixel_ratio": float(ratio.mean()),
+            })
+        return result
+
+class AnalyticsLog:
+    """
+    Хранилище журнала анализов в каталоге directory.
+    """
+    RECORDS_FILE = "analysis.jsonl"
+    REFERENCE_SETS_FILE = "reference_sets.jsonl"
+    IMPORTED_FILE = "imported_legacy.jsonl"
+
+    def __init__(self, directory="logs"):
+        self.directory = directory
+        self.records_path = os.path.join(directory, self.RECORDS_FILE)
+        self.reference_sets_path = os.path.join(directory, self.REFERENCE_SETS_FILE)
+        self.imported_path = os.path.join(directory, self.IMPORTED_FILE)
+        self._known_sets = None
+
+    @staticmethod
+    def reference_set_hash(reference_points):
+        local_coords, global_coords = CoordinateConverter.reference_arrays(reference_points)
+        return HomographyModel.make_fingerprint(local_coords, global_coords)
+
+    def known_sets(self):
+        """
+        Хэши уже сохранённых наборов реперных точек (файл читается один раз).
+        """
+        if self._known_sets is None:
+            self._known_sets = set()
+            if os.path.exists(self.reference_sets_path):
+                with open(self.reference_sets_path, 'r', encoding='utf-8') as sets_file:
+                    for line in sets_file:
+                        if line.strip():
+                            self._known_sets.add(json.loads(line)["hash"])
+        return self._known_sets
+
+    def _append_lines(self, path, lines):
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        with open(path, 'a', encoding='utf-8') as log_file:
+            log_file.write("".join(json.dumps(line, ensure_ascii=False, separators=(',', ':')) + "\n" for line in lines))
+
+    def store_reference_set(self, reference_points):
+        """
+        Сохраняет набор реперных точек, если его ещё нет в журнале. Возвращает его хэш.
+        """
+        ref_set = self.reference_set_hash(reference_points)
+        if ref_set not in self.known_sets():
+            local_coords, global_coords = CoordinateConverter.reference_arrays(reference_points)
+            self._append_lines(self.reference_sets_path, [{
+                "hash": ref_set,
+                "local_coords": local_coords.tolist(),
+                "global_coords": global_coords.tolist(),
+            }])
+            self.known_sets().add(ref_set)
+        return ref_set
+
+    def append(self, reference_points, local_coords, known_coords, computed_coords, deviation, width_pixel,
+               deviation_to_pixel_ratio, time=None):
+        """
+        Дописывает один анализ.
+        """
+        self.append_many(reference_points, [local_coords], [known_coords], [computed_coords], [deviation],
+                         width_pixel, [deviation_to_pixel_ratio], time)
+
+    def append_many(self, reference_points, local_coords, known_coords, computed_coords, deviations, width_pixel,
+                    ratios, time=None):
+        """
+        Дописывает несколько анализов, выполненных по одному набору реперных точек.
+        """
+        ref_set = self.store_reference_set(reference_points)
+        num_ref_points = len(CoordinateConverter.reference_arrays(reference_points)[0])
+        time = (time or datetime.now()).isoformat(timespec='seconds')
+        columns = zip(
+            np.asarray(local_coords, dtype=np.float64).reshape(-1, 2).tolist(),
+            np.asarray(known_coords, dtype=np.float64).reshape(-1, 2).tolist(),
+            np.asarray(computed_coords, dtype=np.float64).reshape(-1, 2).tolist(),
+            np.asarray(deviations, dtype=np.float64).ravel().tolist(),
+            np.asarray(ratios, dtype=np.float64).ravel().tolist(),
+        )
+        self._append_lines(self.records_path, [
+            {
+                "time": time,
+                "ref_set": ref_set,
+                "num_ref_points": num_ref_points,
+                "local_coords": local,
+                "known_coords": known,
+                "computed_coords": computed,
+                "deviation": deviation,
+                "width_pixel": float(width_pixel),
+                "deviation_to_pixel_ratio": ratio,
+            }
+            for local, known, computed, deviation, ratio in columns
+        ])
+
+    def append_report(self, reference_points, report, time=None):
+        """
+        Дописывает все контрольные точки отчёта AccuracyEvaluator.
+        """
+        self.append_many(reference_points, report.local_coords, report.known_coords, report.computed_coords,
+                         report.deviations, report.width_pixel, report.ratios, time)
+
+    def read(self):
+        """
+        Весь журнал в виде AnalysisRecords.
+        """
+        records = []
+        if os.path.exists(self.records_path):
+            with open(self.records_path, 'r', encoding='utf-8') as log_file:
+                records = [json.loads(line) for line in log_file if line.strip()]
+        return AnalysisRecords.from_records(records)
+
+    def query(self, since=None, until=None, ref_set=None):
+        return self.read().query(since, until, ref_set)
+
+    def reference_set(self, ref_set):
+        """
+        Набор реперных точек по хэшу.
+        """
+        if os.path.exists(self.reference_sets_path):
+            with open(self.reference_sets_path, 'r', encoding='utf-8') as sets_file:
+                for line in sets_file:
+                    if line.strip():
+                        record = json.loads(line)
+                        if record["hash"] == ref_set:
+                            return PointSet.from_arrays(record["local_coords"], record["global_coords"])
+        raise KeyError(f"Набор реперных точек {ref_set} не найден в журнале")
+
+    def imported_files(self):
+        """
+        Имена старых файлов анализов, уже перенесённых в журнал.
+        """
+        if not os.path.exists(self.imported_path):
+            return set()
+        with open(self.imported_path, 'r', encoding='utf-8') as imported_file:
+            return {json.loads(line)["file"] for line in imported_file if line.strip()}
+
+    def import_legacy(self, directory):
+        """
+        Переносит в журнал старые файлы analysis_*.json (по одному на анализ). Имена перенесённых
+        файлов запоминаются, поэтому повторный перенос того же каталога не дублирует записи.
+        Возвращает число перенесённых файлов.
+        """
+        imported_files = self.imported_files()
+        imported = 0
+        for file_name in sorted(glob.glob(os.path.join(directory, "analysis_*.json"))):
+            base_name = os.path.basename(file_name)
+            if base_name in imported_files:
+                continue
+            with open(file_name, 'r', encoding='utf-8') as json_file:
+                data = json.load(json_file)
+            stamp = os.path.splitext(os.path.basename(file_name))[0][len("analysis_"):]
+            self.append(
+                PointSet.from_dicts(data["ref_points"]),
+                data["target_point"]["local_coords"],
+                data["target_point"]["global_coords"],
+                data["calculate_target_point"]["global_coords"],
+                data["deviation"],
+                data["width_pixel"],
+                data["deviation_to_pixel_ratio"],
+                datetime.strptime(stamp, '%Y%m%d_%H%M%S'),
+            )
+            self._append_lines(self.imported_path, [{"file": base_name}])
+            imported_files.add(base_name)
+            imported += 1
+        return imported
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log-dir", default="logs", help="каталог журнала")
+    parser.add_argument("--by", default="day", choices=("day", "month", "ref_set"), help="группировка статистики")
+    parser.add_argument("--since", default=None, help="начало интервала (ISO)")
+    parser.add_argument("--until", default=None, help="конец интервала (ISO)")
+    parser.add_argument("--import-legacy", default=None, metavar="DIR", help="перенести старые файлы analysis_*.json")
+    args = parser.parse_args(argv)
+
+    log = AnalyticsLog(args.log_dir)
+    if args.import_legacy:
+        print(f"Перенесено анализов: {log.import_legacy(args.import_legacy)}", file=sys.stderr)
+    for row in log.query(args.since, args.until).aggregate(args.by):
+        print(json.dumps(row, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,7 @@
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QPushButton, QLabel
 from Point import Point
-import os
-import json
-from datetime import datetime
-import numpy as np
+from AccuracyEvaluator import AccuracyEvaluator
+from AnalyticsLog import AnalyticsLog
 
 class AnalyticsWindow(QDialog):
     def __init__(self, ref_points, target_point):
@@ -83,7 +81,7 @@ class AnalyticsWindow(QDialog):
         has_errors = False
             
         try:
-            x = float(self.coord_x_input.text())
+            x = float(self.coord_ref_x_input.text())
         except ValueError:
             self.coord_ref_x_input.setText("")
             self.coord_ref_x_input.setPlaceholderText("Координата должна быть числом!")
@@ -119,53 +117,27 @@ class AnalyticsWindow(QDialog):
         input_field.setStyleSheet('color: black')
 
     def calculate_width_pixel(self):
-        ref_local_coords = np.array([point.local_coords for point in self.ref_points])
-        ref_global_coords = np.array([point.global_coords for point in self.ref_points])
-
-        local_distances = np.linalg.norm(ref_local_coords[1:] - ref_local_coords[:-1], axis=1)
-        global_distances = np.linalg.norm(ref_global_coords[1:] - ref_global_coords[:-1], axis=1)
-        pixel_lengths = global_distances / local_distances
-        
-        return np.mean(pixel_lengths)
+        return AccuracyEvaluator.width_pixel(self.ref_points)
 
     def calculate_deviation(self):
-        return np.linalg.norm(self.ref_target_point.global_coords - self.target_point.global_coords)
+        return AccuracyEvaluator.deviation(self.ref_target_point.global_coords, self.target_point.global_coords)
 
     def calculate_deviation_to_pixel_ratio(self):
-        return self.deviation / self.width_pixel if self.width_pixel != 0 else 0
+        return AccuracyEvaluator.deviation_to_pixel_ratio(self.deviation, self.width_pixel)
 
-    def convert_to_standard_types(self, data):
+    def save_analys(self):
         """
-        Рекурсивная функция для преобразования данных типа float32 и других типов в стандартные типы Python.
+        Дописывает анализ в журнал logs/analysis.jsonl (набор реперных точек сохраняется в журнале один раз).
         """
-        if isinstance(data, np.float32):  # Преобразуем float32 в float
-            return float(data)
-        elif isinstance(data, dict):  # Если это словарь, рекурсивно обрабатываем его значения
-            return {key: self.convert_to_standard_types(value) for key, value in data.items()}
-        elif isinstance(data, list):  # Если это список, рекурсивно обрабатываем его элементы
-            return [self.convert_to_standard_types(item) for item in data]
-        return data  # Если это не специальный тип, возвращаем данные как есть
-
-    def save_analys(self):
-        data = {
-            "target_point": self.ref_target_point.to_dict(),
-            "calculate_target_point": self.target_point.to_dict(),
-            "deviation": self.deviation,
-            "width_pixel": self.width_pixel,
-            "deviation_to_pixel_ratio": self.calculate_deviation_to_pixel_ratio(),
-            "num_ref_points": len(self.ref_points),
-            "ref_points": [point.to_dict() for point in self.ref_points]
-        }
-
-        data = self.convert_to_standard_types(data)
-
-        if not os.path.exists("logs"):
-            os.makedirs("logs")
-
-        # Сохранение данных в файл JSON
-        file_name = f"logs/analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(file_name, 'w') as json_file:
-            json.dump(data, json_file, indent=4, ensure_ascii=False)
+        AnalyticsLog().append(
+            self.ref_points,
+            self.ref_target_point.local_coords,
+            self.ref_target_point.global_coords,
+            self.target_point.global_coords,
+            self.deviation,
+            self.width_pixel,
+            self.calculate_deviation_to_pixel_ratio(),
+        )
 
     def analys(self):
         if self.accept_coords():
@@ -0,0 +1,108 @@
+import json
+import hashlib
+from datetime import datetime
+import numpy as np
+from Point import PointSet
+from CoordinateConverter import CoordinateConverter, HomographyModel
+
+class Calibration:
+    """
+    Калибровка камеры: реперные точки, подобранная гомография с маской инлаеров,
+    хэш изображения, по которому выбирались точки, и идентификатор камеры.
+    Хранится в несжатом .npz, загрузка не требует повторного подбора гомографии.
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, reference_points, model=None, image_hash=None, camera_id=None, created=None):
+        self.reference_points = PointSet.from_points(reference_points)
+        self.model = model
+        self.image_hash = image_hash
+        self.camera_id = camera_id
+        self.created = created if created is not None else datetime.now().isoformat(timespec='seconds')
+
+    @classmethod
+    def from_points(cls, reference_points, image=None, camera_id=None):
+        """
+        Калибровка по текущему набору точек: гомография берётся из CoordinateConverter
+        (без повторного подбора, если набор не менялся).
+        """
+        model = CoordinateConverter.get_homography(reference_points)
+        image_hash = cls.hash_image(image) if image is not None else None
+        return cls(reference_points, model, image_hash, camera_id)
+
+    @staticmethod
+    def hash_image(image):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str((image.shape, image.dtype.str)).encode())
+        digest.update(np.ascontiguousarray(image).tobytes())
+        return digest.hexdigest()
+
+    def fingerprint(self):
+        local_coords, global_coords = self.reference_points.reference_arrays()
+        return HomographyModel.make_fingerprint(local_coords, global_coords)
+
+    def is_current(self, image=None, camera_id=None):
+        """
+        Калибровка актуальна, если гомография посчитана по сохранённым точкам,
+        а изображение и камера (если указаны) совпадают с сохранёнными.
+        """
+        if self.model is None or self.model.fingerprint != self.fingerprint():
+            return False
+        if image is not None and self.image_hash is not None and self.hash_image(image) != self.image_hash:
+            return False
+        if camera_id is not None and self.camera_id is not None and camera_id != self.camera_id:
+            return False
+        return True
+
+    def check_camera(self, camera_id):
+        """
+        Ошибка, если калибровка выполнена для другой камеры.
+        """
+        if camera_id is not None and self.camera_id is not None and camera_id != self.camera_id:
+            raise ValueError(f"Калибровка выполнена для камеры {self.camera_id}, а не для {camera_id}")
+
+    def activate(self):
+        """
+        Передаёт гомографию в CoordinateConverter. Подбор выполняется только если
+        сохранённая гомография не соответствует точкам.
+        """
+        if self.model is None or self.model.fingerprint != self.fingerprint():
+            CoordinateConverter.invalidate()
+            self.model = CoordinateConverter.get_homography(self.reference_points)
+        else:
+            CoordinateConverter.set_homography(self.model)
+        return self.model
+
+    def save(self, file_name):
+        meta = {
+            "format_version": self.FORMAT_VERSION,
+            "image_hash": self.image_hash,
+            "camera_id": self.camera_id,
+            "created": self.created,
+            "fingerprint": self.model.fingerprint if self.model is not None else None,
+        }
+        arrays = {
+            "meta": np.array(json.dumps(meta, ensure_ascii=False)),
+            "local_coords": self.reference_points.local_coords,
+            "global_coords": self.reference_points.global_coords,
+        }
+        if self.model is not None:
+            arrays["homography"] = self.model.H
+            arrays["inliers"] = self.model.inliers
+
+        with open(file_name, 'wb') as calibration_file:
+            np.savez(calibration_file, **arrays)
+
+    @classmethod
+    def load(cls, file_name):
+        with np.load(file_name, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("format_version") != cls.FORMAT_VERSION:
+                raise ValueError(f"Неподдерживаемая версия файла калибровки: {meta.get('format_version')}")
+
+            reference_points = PointSet.from_arrays(data["local_coords"], data["global_coords"])
+            model = None
+            if "homography" in data:
+                model = HomographyModel(data["homography"], data["inliers"], meta["fingerprint"])
+
+        return cls(reference_points, model, meta["image_hash"], meta["camera_id"], meta["created"])
@@ -1,57 +1,159 @@
+import hashlib
 import numpy as np
-from Point import Point
+from Point import Point, PointSet
+from Instrumentation import timed
 import cv2
 
+class HomographyModel:
+    """
+    Подобранная по реперным точкам гомография: матрица H, маска инлаеров RANSAC
+    и отпечаток набора точек, по которому она была посчитана.
+    """
+    def __init__(self, H, inliers, fingerprint):
+        self.H = H
+        self.inliers = inliers
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def make_fingerprint(local_coords, global_coords):
+        """
+        Отпечаток набора реперных точек: меняется при любом изменении координат.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(local_coords).tobytes())
+        digest.update(np.ascontiguousarray(global_coords).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    @timed("homography_fit")
+    def fit(cls, local_coords, global_coords, fingerprint=None):
+        """
+        Вычисляет гомографию методом RANSAC.
+        """
+        if fingerprint is None:
+            fingerprint = cls.make_fingerprint(local_coords, global_coords)
+
+        H, status = cv2.findHomography(local_coords, global_coords, cv2.RANSAC)
+        if H is None:
+            raise ValueError("Не удалось вычислить гомографию по заданным реперным точкам.")
+
+        return cls(H, status.ravel().astype(bool), fingerprint)
+
+    def transform(self, local_coords):
+        """
+        Переводит массив локальных координат формы (N, 2) в глобальные.
+        """
+        local_coords = np.asarray(local_coords, dtype='float64').reshape(-1, 1, 2)
+        return cv2.perspectiveTransform(local_coords, self.H).reshape(-1, 2)
+
 class CoordinateConverter:  
+    # Последняя подобранная гомография, переиспользуется пока набор реперных точек не изменится
+    _homography = None
+
     @staticmethod
-    def convert_to_global(reference_points, target_point):
+    def reference_arrays(reference_points):
         """
-        Определяет глобальные координаты для искомой точки на основе списка реперных точек.
-        
-        reference_points: Список реперных точек (Point), у которых есть local_coords и global_coords.
-        target_point: Искомая точка (Point), у которой есть только local_coords.
+        Возвращает массивы локальных и глобальных координат реперных точек.
+        Для PointSet массивы берутся напрямую из набора, без пересборки.
+        """
+        if isinstance(reference_points, PointSet):
+            return reference_points.reference_arrays()
+
+        local_coords = np.array([pt.local_coords for pt in reference_points], dtype='float64').reshape(-1, 2)
+        global_coords = np.array([pt.global_coords for pt in reference_points], dtype='float64').reshape(-1, 2)
+        return local_coords, global_coords
+
+    @classmethod
+    def get_homography(cls, reference_points):
         """
-        if not reference_points:
+        Возвращает гомографию для набора реперных точек, пересчитывая её только при изменении набора.
+        """
+        # Получение локальных и глобальных координат реперных точек
+        local_coords, global_coords = cls.reference_arrays(reference_points)
+
+        if len(local_coords) == 0:
             raise ValueError("Список реперных точек пуст.")
         
-        if len(reference_points) < 4:
+        if len(local_coords) < 4:
             raise ValueError("Необходимо как минимум 4 реперные точки для вычисления гомографии.")
 
-        # Получение локальных и глобальных координат реперных точек
-        local_coords = np.array([pt.local_coords for pt in reference_points], dtype='float32')
-        global_coords = np.array([pt.global_coords for pt in reference_points], dtype='float32')
+        fingerprint = HomographyModel.make_fingerprint(local_coords, global_coords)
 
-        # Нахождение матрицы гомографии
-        H, status = cv2.findHomography(local_coords, global_coords, cv2.RANSAC)
+        if cls._homography is None or cls._homography.fingerprint != fingerprint:
+            cls._homography = HomographyModel.fit(local_coords, global_coords, fingerprint)
+        return cls._homography
+
+    @classmethod
+    def set_homography(cls, model):
+        """
+        Устанавливает заранее подобранную гомографию (например, загруженную из файла калибровки).
+        """
+        cls._homography = model
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Сбрасывает сохранённую гомографию (вызывается при изменении реперных точек).
+        """
+        cls._homography = None
+
+    @classmethod
+    def convert_to_global(cls, reference_points, target_point):
+        """
+        Определяет глобальные координаты для искомой точки на основе списка реперных точек.
+        
+        reference_points: Список реперных точек (Point), у которых есть local_coords и global_coords.
+        target_point: Искомая точка (Point), у которой есть только local_coords.
+        """
+        model = cls.get_homography(reference_points)
 
         # Преобразование локальных координат искомой точки в глобальные
-        target_local = np.array([[target_point.local_coords]], dtype='float32')  # добавляем лишний уровень вложенности для функции transform
-        target_global = cv2.perspectiveTransform(target_local, H)
+        target_global = model.transform([target_point.local_coords])
 
-        target_point.global_coords = target_global[0][0]
+        target_point.global_coords = target_global[0]
         return target_point
     
+    @classmethod
+    def convert_many(cls, reference_points, local_coords):
+        """
+        Переводит сразу массив локальных координат формы (N, 2) в глобальные (N, 2)
+        одним вызовом perspectiveTransform.
+        """
+        model = cls.get_homography(reference_points)
+        return model.transform(local_coords)
+
     @staticmethod
-    def simple_linear_transformation(reference_points, target_point):
-        if len(reference_points) < 2:
-            raise ValueError("Для линейного преобразования необходимо как минимум 2 реперные точки.")
-        
+    def fit_linear(reference_points):
+        """
+        Коэффициенты линейного (аффинного) преобразования формы (3, 2) методом наименьших квадратов.
+        """
         # Получаем локальные и глобальные координаты
-        local_coords = np.array([pt.local_coords for pt in reference_points], dtype='float32')
-        global_coords = np.array([pt.global_coords for pt in reference_points], dtype='float32')
+        local_coords, global_coords = CoordinateConverter.reference_arrays(reference_points)
+
+        if len(local_coords) < 2:
+            raise ValueError("Для линейного преобразования необходимо как минимум 2 реперные точки.")
 
         # Линейная регрессия для определения коэффициентов
-        A = np.vstack([local_coords.T, np.ones(len(local_coords))]).T
-        m, c, a = np.linalg.lstsq(A, global_coords, rcond=None)[0]
+        A = np.hstack([local_coords, np.ones((len(local_coords), 1), dtype=local_coords.dtype)])
+        return np.linalg.lstsq(A, global_coords, rcond=None)[0]
 
+    @staticmethod
+    def simple_linear_many(reference_points, local_coords):
+        """
+        Линейное преобразование массива локальных координат (N, 2) одним матричным умножением.
+        """
+        coeffs = CoordinateConverter.fit_linear(reference_points)
+        local_coords = np.asarray(local_coords, dtype='float64').reshape(-1, 2)
+        return local_coords @ coeffs[:2] + coeffs[2]
+
+    @staticmethod
+    def simple_linear_transformation(reference_points, target_point):
         # Применяем к искомой точке
-        target_local = np.array(target_point.local_coords)
-        target_global = m @ target_local + c
+        target_global = CoordinateConverter.simple_linear_many(reference_points, [target_point.local_coords])
 
-        target_point.global_coords = target_global
+        target_point.global_coords = target_global[0]
         return target_point
 
-
 # Пример использования
 if __name__ == "__main__":
     target_point = Point(local_coords=(576, 403))  
@@ -0,0 +1,99 @@
+import os
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from CoordinateConverter import CoordinateConverter
+from AccuracyEvaluator import AccuracyEvaluator, AccuracyReport
+
+class CrossValidator:
+    """
+    Перекрёстная проверка набора реперных точек: преобразование подбирается заново без
+    каждой точки (leave-one-out) или без каждой группы точек (k-fold), и отложенные точки
+    сравниваются с их известными глобальными координатами.
+
+    Массивы координат извлекаются один раз, подборы выполняются в пуле потоков
+    (cv2.findHomography отпускает GIL).
+    """
+    HOMOGRAPHY = AccuracyEvaluator.HOMOGRAPHY
+    LINEAR = AccuracyEvaluator.LINEAR
+    # Минимальное число точек для подбора преобразования
+    MIN_POINTS = {HOMOGRAPHY: 4, LINEAR: 2}
+
+    def __init__(self, reference_points, method=HOMOGRAPHY, workers=None):
+        if method not in self.MIN_POINTS:
+            raise ValueError(f"Неизвестный способ перевода координат: {method}")
+        self.reference_points = reference_points
+        self.method = method
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.local_coords, self.global_coords = CoordinateConverter.reference_arrays(reference_points)
+
+    def fit_predict(self, fold):
+        """
+        Подбирает преобразование по всем точкам, кроме fold, и переводит точки fold.
+        Если подобрать преобразование не удалось, возвращает NaN.
+        """
+        train = np.ones(len(self.local_coords), dtype=bool)
+        train[fold] = False
+        local_train, global_train = self.local_coords[train], self.global_coords[train]
+        test = self.local_coords[fold]
+
+        if self.method == self.LINEAR:
+            A = np.hstack([local_train, np.ones((len(local_train), 1))])
+            coeffs = np.linalg.lstsq(A, global_train, rcond=None)[0]
+            return test @ coeffs[:2] + coeffs[2]
+
+        H, _ = cv2.findHomography(local_train, global_train, cv2.RANSAC)
+        if H is None:
+            return np.full(test.shape, np.nan)
+        return cv2.perspectiveTransform(test.reshape(-1, 1, 2), H).reshape(-1, 2)
+
+    def run_folds(self, folds):
+        """
+        Предсказания для всех отложенных групп. Группы делятся на порции по числу потоков,
+        чтобы не создавать задачу на каждый подбор.
+        """
+        predicted = np.full(self.global_coords.shape, np.nan)
+
+        def run_chunk(chunk):
+            return [(fold, self.fit_predict(fold)) for fold in chunk]
+
+        if self.workers <= 1 or len(folds) <= 1:
+            results = [run_chunk(folds)]
+        else:
+            chunks = [folds[i::self.workers * 4] for i in range(min(self.workers * 4, len(folds)))]
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(run_chunk, chunks))
+
+        for chunk in results:
+            for fold, values in chunk:
+                predicted[fold] = values
+        return predicted
+
+    def check_size(self, held_out):
+        count = len(self.local_coords)
+        if count - held_out < self.MIN_POINTS[self.method]:
+            raise ValueError(f"Для перекрёстной проверки недостаточно реперных точек: {count}")
+
+    def report(self, predicted, name):
+        width_pixel = AccuracyEvaluator.width_pixel(self.reference_points)
+        return AccuracyReport(self.local_coords, self.global_coords, predicted, width_pixel,
+                              len(self.local_coords), f"{self.method}, {name}")
+
+    def leave_one_out(self):
+        """
+        Остаток для каждой точки при подборе по всем остальным точкам.
+        """
+        self.check_size(1)
+        folds = [np.array([i]) for i in range(len(self.local_coords))]
+        return self.report(self.run_folds(folds), "leave-one-out")
+
+    def k_fold(self, k=5, seed=0):
+        """
+        Точки случайно делятся на k групп, каждая группа предсказывается по остальным.
+        """
+        count = len(self.local_coords)
+        if not 2 <= k <= count:
+            raise ValueError(f"Число групп должно быть от 2 до {count}")
+        folds = np.array_split(np.random.default_rng(seed).permutation(count), k)
+        self.check_size(max(len(fold) for fold in folds))
+        return self.report(self.run_folds(folds), f"{k}-fold")
@@ -1,6 +1,7 @@
-from PyQt5.QtWidgets import QFileDialog, QMessageBox
-from PyQt5.QtGui import QPixmap, QImage
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QInputDialog
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QColor, QPolygonF
+from PyQt5.QtCore import Qt, QPointF
+import os
 import cv2
 import numpy as np
 
@@ -8,18 +9,56 @@ class DisplayUtils:
 
     GREEN = (0, 255, 0)
     RED = (0, 0, 255)
+    VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv")
 
     @staticmethod
     def open_image_file():
         """
         Открыть диалоговое окно для выбора файла изображения или видео.
         """
-        file_name, _ = QFileDialog.getOpenFileName(None, "Выберите изображение", "", "Images (*.png *.jpg *.bmp *.jpeg);;Videos (*.mp4 *.avi *.mkv)")
+        videos = " ".join("*" + extension for extension in DisplayUtils.VIDEO_EXTENSIONS)
+        file_name, _ = QFileDialog.getOpenFileName(None, "Выберите изображение", "", f"Images (*.png *.jpg *.bmp *.jpeg);;Videos ({videos})")
         if not file_name:
             return False
-        if not cv2.haveImageReader(file_name):
+        if not cv2.haveImageReader(file_name) and not DisplayUtils.is_video_file(file_name):
             raise Exception('Ошибка чтения файла')
-        return file_name        
+        return file_name
+
+    @staticmethod
+    def is_video_file(file_name):
+        return os.path.splitext(file_name)[1].lower() in DisplayUtils.VIDEO_EXTENSIONS        
+
+    @staticmethod
+    def open_calibration_file():
+        """
+        Открыть диалоговое окно для выбора файла калибровки.
+        """
+        file_name, _ = QFileDialog.getOpenFileName(None, "Загрузить калибровку", "", "Calibration (*.npz)")
+        return file_name or False
+
+    @staticmethod
+    def open_checkpoints_file():
+        """
+        Открыть диалоговое окно для выбора файла контрольных точек.
+        """
+        file_name, _ = QFileDialog.getOpenFileName(None, "Контрольные точки", "", "Checkpoints (*.csv *.json)")
+        return file_name or False
+
+    @staticmethod
+    def save_calibration_file():
+        """
+        Открыть диалоговое окно для выбора пути сохранения калибровки.
+        """
+        file_name, _ = QFileDialog.getSaveFileName(None, "Сохранить калибровку", "calibration.npz", "Calibration (*.npz)")
+        return file_name or False
+
+    @staticmethod
+    def ask_camera_id(default=""):
+        """
+        Запросить идентификатор камеры, для которой сохраняется калибровка.
+        """
+        camera_id, ok = QInputDialog.getText(None, "Сохранить калибровку", "Идентификатор камеры:", text=default)
+        return camera_id.strip() if ok and camera_id.strip() else False
 
     @staticmethod
     def show_message(message):
@@ -32,34 +71,86 @@ class DisplayUtils:
         
     @staticmethod
     def from_cv_to_qimg(image):
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        original_height, original_width, _ = image_rgb.shape
+        """
+        QImage поверх буфера массива OpenCV без перестановки каналов и копирования
+        (копия делается только для несмежного в памяти массива).
+        QImage не владеет памятью, поэтому массив сохраняется в атрибуте buffer
+        и живёт столько же, сколько Python-объект QImage.
+        """
+        if image.ndim == 2:
+            image_format = QImage.Format_Grayscale8
+        elif hasattr(QImage, 'Format_BGR888'):
+            image_format = QImage.Format_BGR888
+        else:
+            # Qt < 5.14: формата BGR888 нет, нужна перестановка каналов
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            image_format = QImage.Format_RGB888
+
+        image = np.ascontiguousarray(image)
+        original_height, original_width = image.shape[:2]
         
         # Преобразуем изображение OpenCV в формат QImage
-        bytes_per_line = 3 * original_width
-        return QImage(image_rgb.data, original_width, original_height, bytes_per_line, QImage.Format_RGB888)
+        qimage = QImage(image.data, original_width, original_height, image.strides[0], image_format)
+        qimage.buffer = image
+        return qimage
 
     @staticmethod
     def from_qimg_to_cv(image):
-        qimage = image.convertToFormat(QImage.Format.Format_RGB888)
+        """
+        Массив OpenCV (BGR) из QImage: одно копирование из памяти Qt без перестановки каналов.
+        """
+        if hasattr(QImage, 'Format_BGR888'):
+            qimage = image.convertToFormat(QImage.Format_BGR888)
+        else:
+            qimage = image.convertToFormat(QImage.Format_RGB888)
         width = qimage.width()
         height = qimage.height()
 
-        ptr = qimage.bits()
-        ptr.setsize(height * width * 3)  
-        arr = np.array(ptr).reshape(height, width, 3)  
+        ptr = qimage.constBits()
+        ptr.setsize(height * qimage.bytesPerLine())
+        # Строки QImage выровнены по 4 байта, лишние байты в конце строки отбрасываются
+        arr = np.frombuffer(ptr, dtype=np.uint8).reshape(height, qimage.bytesPerLine())[:, :width * 3]
+        arr = arr.reshape(height, width, 3)
 
-        image = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
-        return image
+        if qimage.format() == QImage.Format_RGB888:
+            return cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+        return arr.copy()
 
     @staticmethod
     def draw_point(image, point, radius):
         if point.has_global(): color = DisplayUtils.GREEN
         else: color = DisplayUtils.RED
 
-        image = cv2.circle(image, point.local_coords, radius, color, thickness=-1)
+        center = tuple(int(c) for c in point.local_coords)
+        image = cv2.circle(image, center, radius, color, thickness=-1)
         return image
 
+    @staticmethod
+    def draw_points_overlay(size, points, scale_factor, radius):
+        """
+        Рисует точки на прозрачном слое размера size (в координатах отображения).
+        Точки с глобальными координатами - зелёные, без них - красные.
+        """
+        overlay = QPixmap(size)
+        overlay.fill(Qt.transparent)
+        if not points:
+            return overlay
+
+        local_coords = points.local_coords * scale_factor
+        has_global = points.has_global()
+
+        painter = QPainter(overlay)
+        painter.setRenderHint(QPainter.Antialiasing)
+        for mask, (b, g, r) in ((has_global, DisplayUtils.GREEN), (~has_global, DisplayUtils.RED)):
+            if not mask.any():
+                continue
+            # Точка, нарисованная круглым пером толщиной 2 * radius, - закрашенный круг
+            pen = QPen(QColor(r, g, b), 2 * radius, Qt.SolidLine, Qt.RoundCap)
+            painter.setPen(pen)
+            painter.drawPoints(QPolygonF([QPointF(x, y) for x, y in local_coords[mask].tolist()]))
+        painter.end()
+        return overlay
+
     @staticmethod
     def get_scaled_pixmap(image, max_width=1280, max_height=720):
         
@@ -100,13 +191,14 @@ class DisplayUtils:
         window.exec_()
     
     @staticmethod
-    def open_template_input_window(image):
+    def open_template_input_window(image, image_cv=None):
         """
         Открыть новое окно для выбора шаблона.
+        image_cv: Исходный массив изображения, из которого шаблон вырезается напрямую.
         """
         from TemplateSelectorWindow import TemplateSelectorWindow
         
-        window = TemplateSelectorWindow(image)
+        window = TemplateSelectorWindow(image, image_cv)
         window.exec_()
         
         return window.get_template()
@@ -1,12 +1,18 @@
+import os
+import sys
 import cv2
 import time
+import struct
+import threading
+import numpy as np
+from collections import OrderedDict
 
 try:
     from picamera import PiCamera
     from picamera.array import PiRGBArray
     PiCamera_import = True
 except:
-    print("Picamera import error")
+    print("Picamera import error", file=sys.stderr)
     PiCamera_import = False
 
 try:
@@ -14,9 +20,15 @@ try:
     from libcamera import Transform, ColorSpace, controls
     PiCamera2_import = True
 except ImportError:
-    print("Picamera2 import error")
+    print("Picamera2 import error", file=sys.stderr)
     PiCamera2_import = False
 
+class EndOfStream(Exception):
+    """
+    Кадры источника закончились (конец видеофайла или файла кадров).
+    Остальные ошибки чтения кадров выбрасываются как обычные исключения.
+    """
+
 class FrameCapture:
     def get_frame(self):
         raise NotImplementedError
@@ -31,18 +43,129 @@ class FrameCapture:
         raise NotImplementedError
 
 class OpenCVFrameCapture(FrameCapture):
-    def __init__(self, video_path):
+    """
+    Видео или камера через cv2.VideoCapture. Кадры декодируются только по запросу.
+    get_frame читает кадры подряд, пока декодер их отдаёт. Для видеофайлов поддерживается
+    переход к кадру по номеру или времени; кадры, полученные get_frame_at, хранятся
+    в LRU-кэше объёмом не больше cache_size байт, поэтому повторный переход к тем же
+    кадрам не требует декодирования.
+
+    Кадры из кэша общие: изменять кадр, возвращённый get_frame_at, нельзя.
+    """
+    # Переход вперёд не больше чем на столько кадров выполняется пропуском (grab), а не поиском
+    MAX_SKIP_FRAMES = 30
+
+    def __init__(self, video_path, cache_size=256 * 1024 * 1024):
         self.cap = cv2.VideoCapture(video_path)
         if not self.is_opened():
             raise Exception(f"Не удалось открыть видеофайл по пути: {video_path}")
+        # Для камеры (номер устройства) неудачное чтение - ошибка, а не конец потока
+        self.is_camera = isinstance(video_path, int)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.cached_bytes = 0
+        # Число кадров видеофайла по метаданным (0 для камеры или потока), может быть неточным
+        self.frame_count = max(int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)), 0)
+        self.position = 0           # номер кадра, который вернёт следующий get_frame
+        self.decoder_position = 0   # номер кадра, который декодер отдаст следующим
+
+    @property
+    def fps(self):
+        return self.cap.get(cv2.CAP_PROP_FPS)
+
+    def is_seekable(self):
+        return self.frame_count > 0
 
     def get_frame(self):
+        """
+        Следующий кадр прямо из декодера, без кэша. Чтение идёт до конца потока,
+        а не до числа кадров из метаданных.
+        """
+        if self.position != self.decoder_position:
+            self._decode_to(self.position)
+        frame = self._read()
+        self.position = self.decoder_position
+        return frame
+
+    def seek(self, index):
+        """
+        Следующий get_frame вернёт кадр с номером index.
+        """
+        if not self.is_seekable():
+            raise Exception("Переход к кадру недоступен для этого источника")
+        if not 0 <= index < self.frame_count:
+            raise ValueError(f"Номер кадра {index} вне диапазона 0..{self.frame_count - 1}")
+        self.position = int(index)
+
+    def seek_time(self, seconds):
+        """
+        Следующий get_frame вернёт кадр, соответствующий времени seconds от начала видео.
+        """
+        self.seek(self.index_at(seconds))
+
+    def index_at(self, seconds):
+        fps = self.fps
+        if fps <= 0:
+            raise Exception("Частота кадров видео неизвестна")
+        return min(int(round(seconds * fps)), self.frame_count - 1)
+
+    def get_frame_at(self, index):
+        """
+        Кадр с номером index: из кэша или декодированный. После вызова позиция указывает на следующий кадр.
+        """
+        self.seek(index)
+        frame = self.cache.get(index)
+        if frame is not None:
+            self.cache.move_to_end(index)
+        else:
+            self._decode_to(index)
+            frame = self._read()
+            self._cache_frame(index, frame)
+        self.position = index + 1
+        return frame
+
+    def get_frame_at_time(self, seconds):
+        return self.get_frame_at(self.index_at(seconds))
+
+    def _decode_to(self, index):
+        """
+        Устанавливает декодер на кадр index. Небольшие переходы вперёд выполняются
+        пропуском кадров без их распаковки, остальные - поиском в файле.
+        """
+        skip = index - self.decoder_position
+        if 0 <= skip <= self.MAX_SKIP_FRAMES:
+            for _ in range(skip):
+                if not self.cap.grab():
+                    raise Exception("Не удалось получить кадр из видеопотока")
+                self.decoder_position += 1
+        else:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+            self.decoder_position = index
+
+    def _read(self):
         ret, frame = self.cap.read()
         if not ret:
-            raise Exception("Не удалось получить кадр из видеопотока")
+            if self.is_camera:
+                raise Exception("Не удалось получить кадр из видеопотока")
+            raise EndOfStream("Кадры видеофайла закончились")
+        self.decoder_position += 1
         return frame
+
+    def _cache_frame(self, index, frame):
+        if frame.nbytes > self.cache_size:
+            return
+        self.cache[index] = frame
+        self.cached_bytes += frame.nbytes
+        while self.cached_bytes > self.cache_size:
+            _, evicted = self.cache.popitem(last=False)
+            self.cached_bytes -= evicted.nbytes
+
+    def clear_cache(self):
+        self.cache.clear()
+        self.cached_bytes = 0
     
     def release(self):
+        self.clear_cache()
         self.cap.release()
         
     def is_opened(self):
@@ -55,7 +178,312 @@ class OpenCVFrameCapture(FrameCapture):
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, kwargs['height'])
         if 'fps' in kwargs:
             self.cap.set(cv2.CAP_PROP_FPS, kwargs['fps'])
+        self.clear_cache()
     
+class ThreadedFrameCapture(FrameCapture):
+    """
+    Обёртка над любым FrameCapture: кадры читаются в фоновом потоке
+    в заранее выделенный кольцевой буфер.
+
+    policy="latest": get_frame отдаёт самый свежий кадр, непрочитанные кадры отбрасываются.
+    policy="every": get_frame отдаёт кадры по порядку, при заполнении буфера чтение приостанавливается.
+
+    Кадр, возвращённый get_frame, остаётся неизменным до следующего вызова get_frame.
+    """
+    LATEST = "latest"
+    EVERY = "every"
+
+    def __init__(self, capture, buffer_size=4, policy=LATEST, timeout=None):
+        if policy not in (self.LATEST, self.EVERY):
+            raise ValueError(f"Неизвестная политика чтения кадров: {policy}")
+        if buffer_size < 2:
+            raise ValueError("Размер буфера кадров должен быть не меньше 2")
+
+        self.capture = capture
+        self.buffer_size = buffer_size
+        self.policy = policy
+        self.timeout = timeout
+
+        self.frames = None
+        self.condition = threading.Condition()
+        self.thread = None
+        self.start()
+
+    def start(self):
+        """
+        Запуск фонового потока чтения кадров.
+        """
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.head = 0           # слот для следующего записанного кадра
+        self.tail = 0           # слот следующего отдаваемого кадра
+        self.count = 0          # кадров в буфере, ещё не отданных
+        self.captured_frames = 0
+        self.dropped_frames = 0
+        self.error = None
+        self.running = True
+        self.thread = threading.Thread(target=self._reader, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Остановка фонового потока без освобождения источника.
+        """
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def _reader(self):
+        # Один слот всегда зарезервирован под кадр, выданный потребителю
+        capacity = self.buffer_size - 1
+        while True:
+            try:
+                frame = self.capture.get_frame()
+            except Exception as e:
+                with self.condition:
+                    self.error = e
+                    self.running = False
+                    self.condition.notify_all()
+                return
+
+            with self.condition:
+                if self.policy == self.EVERY:
+                    while self.running and self.count >= capacity:
+                        self.condition.wait()
+                elif self.count >= capacity:
+                    # Буфер полон: заменяется самый новый непрочитанный кадр. Отбрасывать самый
+                    # старый нельзя - слот head тогда совпал бы со слотом, выданным потребителю
+                    self.head = (self.head - 1) % self.buffer_size
+                    self.count -= 1
+                    self.dropped_frames += 1
+                if not self.running:
+                    return
+
+                if self.frames is None:
+                    self.frames = np.empty((self.buffer_size,) + frame.shape, dtype=frame.dtype)
+                elif self.frames.shape[1:] != frame.shape or self.frames.dtype != frame.dtype:
+                    self.error = Exception(f"Размер кадра изменился: {self.frames.shape[1:]} -> {frame.shape}")
+                    self.running = False
+                    self.condition.notify_all()
+                    return
+                slot = self.head
+
+            # Слот head не виден потребителю, пока count не увеличен, поэтому копируем без блокировки
+            np.copyto(self.frames[slot], frame)
+
+            with self.condition:
+                self.head = (slot + 1) % self.buffer_size
+                self.count += 1
+                self.captured_frames += 1
+                self.condition.notify_all()
+
+    def get_frame(self):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.count > 0 or not self.running, self.timeout):
+                raise Exception("Превышено время ожидания кадра")
+            if self.count == 0:
+                if self.error is not None:
+                    raise self.error
+                raise Exception("Чтение кадров остановлено")
+
+            if self.policy == self.LATEST and self.count > 1:
+                skipped = self.count - 1
+                self.tail = (self.tail + skipped) % self.buffer_size
+                self.count = 1
+                self.dropped_frames += skipped
+
+            slot = self.tail
+            self.tail = (slot + 1) % self.buffer_size
+            self.count -= 1
+            self.condition.notify_all()
+            return self.frames[slot]
+
+    def stats(self):
+        """
+        Счётчики прочитанных и отброшенных кадров.
+        """
+        with self.condition:
+            return {
+                "captured_frames": self.captured_frames,
+                "dropped_frames": self.dropped_frames,
+                "buffered_frames": self.count,
+            }
+
+    def release(self):
+        self.stop()
+        self.capture.release()
+
+    def is_opened(self):
+        with self.condition:
+            return self.count > 0 or (self.running and self.capture.is_opened())
+
+    def configure(self, **kwargs):
+        self.stop()
+        self.capture.configure(**kwargs)
+        self.frames = None
+        self.start()
+
+class MemmapFrameCapture(FrameCapture):
+    """
+    Декодированные кадры в несжатом файле, отображаемом в память. Кадры отдаются
+    как представления np.memmap без копирования и без повторного декодирования,
+    доступ к кадру по номеру занимает O(1).
+
+    Формат файла: заголовок HEADER_SIZE байт (сигнатура, dtype, число кадров,
+    размерность и форма кадра, частота кадров, признак полной записи, размер и время
+    изменения исходного видео, длина пути к нему и сам путь), затем кадры подряд в C-порядке.
+    """
+    MAGIC = b"FRAMERA2"
+    HEADER = struct.Struct("<8s8sQQQQQdQQdI")
+    HEADER_SIZE = 4096
+
+    def __init__(self, file_path, source=None):
+        """
+        source: Путь к исходному видео; если файл кадров сделан не из него или видео
+                изменилось после записи, выбрасывается исключение.
+        """
+        self.file_path = file_path
+        header = self.read_header(file_path)
+        if source is not None and not self.matches_source(header, source):
+            raise Exception(f"Файл кадров {file_path} создан не из {source} или видео изменилось")
+        self.fps = header["fps"]
+        self.complete = header["complete"]
+        self.source = header["source"]
+        self.frames = np.memmap(file_path, dtype=header["dtype"], mode='r',
+                                offset=self.HEADER_SIZE, shape=(header["count"],) + header["shape"])
+        self.position = 0
+
+    @classmethod
+    def read_header(cls, file_path):
+        with open(file_path, 'rb') as raw_file:
+            header = raw_file.read(cls.HEADER_SIZE)
+        if len(header) < cls.HEADER.size or header[:len(cls.MAGIC)] != cls.MAGIC:
+            raise Exception(f"Файл не является файлом кадров или повреждён: {file_path}")
+        (_, dtype, count, ndim, height, width, channels, fps,
+         complete, source_size, source_mtime, path_length) = cls.HEADER.unpack_from(header)
+        source = header[cls.HEADER.size:cls.HEADER.size + path_length].decode('utf-8')
+        return {
+            "dtype": np.dtype(dtype.rstrip(b"\0").decode()),
+            "count": count,
+            "shape": (height, width, channels)[:ndim],
+            "fps": fps,
+            "complete": bool(complete),
+            "source": source,
+            "source_size": source_size,
+            "source_mtime": source_mtime,
+        }
+
+    @staticmethod
+    def source_stat(source):
+        stat = os.stat(source)
+        return os.path.abspath(source), stat.st_size, stat.st_mtime
+
+    @classmethod
+    def matches_source(cls, header, source):
+        path, size, mtime = cls.source_stat(source)
+        return (header["source"], header["source_size"], header["source_mtime"]) == (path, size, mtime)
+
+    @classmethod
+    def is_current(cls, file_path, source, max_frames=None):
+        """
+        Можно ли взять кадры из file_path вместо декодирования source: файл сделан из этого же
+        видео, и в нём есть все кадры (или хотя бы max_frames, если запись была прервана по лимиту).
+        """
+        try:
+            header = cls.read_header(file_path)
+        except Exception:
+            return False
+        if not cls.matches_source(header, source):
+            return False
+        return header["complete"] or (max_frames is not None and header["count"] >= max_frames)
+
+    @classmethod
+    def dump(cls, capture, file_path, max_frames=None, fps=None, source=None):
+        """
+        Читает кадры из capture (до конца потока или max_frames) и записывает их в file_path.
+        Все кадры должны иметь одинаковые форму и dtype. Возвращает MemmapFrameCapture по записанному файлу.
+
+        fps: Частота кадров для заголовка; по умолчанию берётся у capture.
+        source: Путь к исходному видео, по которому потом проверяется актуальность файла.
+
+        Кадры пишутся во временный файл, который заменяет file_path только после успешной
+        записи, поэтому прерванная запись не оставляет файл с пустым заголовком.
+        """
+        if fps is None:
+            fps = getattr(capture, 'fps', 0)
+        source_path, source_size, source_mtime = cls.source_stat(source) if source is not None else ("", 0, 0.0)
+        source_bytes = source_path.encode('utf-8')
+        if cls.HEADER.size + len(source_bytes) > cls.HEADER_SIZE:
+            raise ValueError(f"Слишком длинный путь к видео: {source_path}")
+
+        count, first, complete = 0, None, False
+        temp_path = f"{file_path}.tmp"
+        try:
+            with open(temp_path, 'wb') as raw_file:
+                raw_file.write(bytes(cls.HEADER_SIZE))
+                while max_frames is None or count < max_frames:
+                    try:
+                        frame = capture.get_frame()
+                    except EndOfStream:
+                        complete = True
+                        break
+                    if first is None:
+                        first = frame
+                        if frame.ndim > 3:
+                            raise ValueError(f"Неподдерживаемая форма кадра: {frame.shape}")
+                    elif frame.shape != first.shape or frame.dtype != first.dtype:
+                        raise Exception(f"Размер кадра изменился: {first.shape} -> {frame.shape}")
+                    np.ascontiguousarray(frame).tofile(raw_file)
+                    count += 1
+
+                if first is None:
+                    raise Exception("Не удалось получить ни одного кадра")
+                shape = tuple(first.shape) + (0,) * (3 - first.ndim)
+                raw_file.seek(0)
+                raw_file.write(cls.HEADER.pack(cls.MAGIC, first.dtype.str.encode(), count, first.ndim, *shape, fps,
+                                               complete, source_size, source_mtime, len(source_bytes)))
+                raw_file.write(source_bytes)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return cls(file_path)
+
+    @property
+    def frame_count(self):
+        return len(self.frames)
+
+    def is_seekable(self):
+        return True
+
+    def seek(self, index):
+        if not 0 <= index < self.frame_count:
+            raise ValueError(f"Номер кадра {index} вне диапазона 0..{self.frame_count - 1}")
+        self.position = int(index)
+
+    def get_frame_at(self, index):
+        self.seek(index)
+        self.position = index + 1
+        return self.frames[index]
+
+    def get_frame(self):
+        if self.position >= self.frame_count:
+            raise EndOfStream("Кадры файла закончились")
+        return self.get_frame_at(self.position)
+
+    def release(self):
+        self.frames = None
+
+    def is_opened(self):
+        return self.frames is not None
+
+    def configure(self, **kwargs):
+        pass
+
 class ImageFrameCapture(FrameCapture):
     def __init__(self, file_path):
         self.file_path = file_path
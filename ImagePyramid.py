@@ -0,0 +1,68 @@
+import math
+from collections import OrderedDict
+import cv2
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import QRectF
+from DisplayUtils import DisplayUtils
+
+class ImagePyramid:
+    """
+    Пирамида изображения для отображения: уровень 0 - исходное изображение,
+    каждый следующий уровень вдвое меньше. Уровни делятся на тайлы, которые
+    переводятся в QPixmap только при первой отрисовке и хранятся в LRU-кэше.
+    """
+    def __init__(self, image, tile_size=512, max_cached_tiles=128):
+        self.tile_size = tile_size
+        self.max_cached_tiles = max_cached_tiles
+        self.height, self.width = image.shape[:2]
+        self.levels = [image]
+        while max(self.levels[-1].shape[:2]) > tile_size:
+            self.levels.append(cv2.pyrDown(self.levels[-1]))
+        self.tiles = OrderedDict()
+
+    def level_for(self, scale):
+        """
+        Самый грубый уровень, на котором на один пиксель экрана приходится не меньше одного пикселя уровня.
+        scale: Число пикселей экрана на один пиксель исходного изображения.
+        """
+        if scale >= 1:
+            return 0
+        level = int(math.floor(math.log2(1 / scale)))
+        return min(level, len(self.levels) - 1)
+
+    def get_tile(self, level, tx, ty):
+        key = (level, tx, ty)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            return tile
+
+        size = self.tile_size
+        image = self.levels[level][ty * size:(ty + 1) * size, tx * size:(tx + 1) * size]
+        tile = QPixmap.fromImage(DisplayUtils.from_cv_to_qimg(image))
+        self.tiles[key] = tile
+        if len(self.tiles) > self.max_cached_tiles:
+            self.tiles.popitem(last=False)
+        return tile
+
+    def visible_tiles(self, level, rect):
+        """
+        Тайлы уровня level, пересекающие прямоугольник rect (в координатах исходного изображения).
+        Возвращает пары (прямоугольник тайла в координатах исходного изображения, QPixmap).
+        """
+        level_image = self.levels[level]
+        level_height, level_width = level_image.shape[:2]
+        sx = self.width / level_width
+        sy = self.height / level_height
+        size = self.tile_size
+
+        x0 = max(int(rect.left() / sx) // size, 0)
+        y0 = max(int(rect.top() / sy) // size, 0)
+        x1 = min(int(math.ceil(rect.right() / sx)) // size, (level_width - 1) // size)
+        y1 = min(int(math.ceil(rect.bottom() / sy)) // size, (level_height - 1) // size)
+
+        for ty in range(y0, y1 + 1):
+            for tx in range(x0, x1 + 1):
+                tile = self.get_tile(level, tx, ty)
+                target = QRectF(tx * size * sx, ty * size * sy, tile.width() * sx, tile.height() * sy)
+                yield target, tile
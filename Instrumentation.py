@@ -0,0 +1,148 @@
+"""
+Замеры длительности горячих путей (загрузка и отрисовка изображения, подбор гомографии,
+поиск по шаблону). Включаются переменной окружения до запуска программы:
+
+    POINTS_TIMING=1        - собирать замеры и сохранить их в JSON при выходе
+    POINTS_TIMING=overlay  - то же и показывать статистику поверх изображения
+    POINTS_TIMING_FILE     - путь к JSON (по умолчанию logs/timing_<дата>.json)
+
+Если замеры выключены, декоратор timed возвращает функцию без изменений.
+Qt не импортируется.
+"""
+import os
+import math
+import json
+import time
+import atexit
+import functools
+from datetime import datetime
+
+class Histogram:
+    """
+    Гистограмма длительностей с логарифмическими корзинами (BUCKETS_PER_OCTAVE корзин
+    на каждое удвоение, начиная с 1 мкс). Запись - O(1), память не зависит от числа замеров.
+    """
+    BUCKETS_PER_OCTAVE = 4
+    BUCKET_COUNT = 4 * 32
+
+    def __init__(self):
+        self.buckets = [0] * self.BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, seconds):
+        microseconds = seconds * 1e6
+        index = int(math.log2(microseconds) * self.BUCKETS_PER_OCTAVE) if microseconds > 1 else 0
+        self.buckets[min(index, self.BUCKET_COUNT - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def bucket_upper(self, index):
+        """
+        Верхняя граница корзины в секундах.
+        """
+        return 2 ** ((index + 1) / self.BUCKETS_PER_OCTAVE) / 1e6
+
+    def percentile(self, q):
+        """
+        Оценка квантиля q (0..1) по верхней границе корзины, не больше максимума.
+        """
+        if self.count == 0:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for index, amount in enumerate(self.buckets):
+            seen += amount
+            if amount and seen >= rank:
+                return min(self.bucket_upper(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "buckets": {f"{self.bucket_upper(i):.6g}": amount for i, amount in enumerate(self.buckets) if amount},
+        }
+
+class Instrumentation:
+    MODE = os.environ.get("POINTS_TIMING", "").strip().lower()
+    enabled = MODE not in ("", "0", "false", "no")
+    overlay = MODE == "overlay"
+    histograms = {}
+
+    @classmethod
+    def record(cls, name, seconds):
+        histogram = cls.histograms.get(name)
+        if histogram is None:
+            histogram = cls.histograms[name] = Histogram()
+        histogram.record(seconds)
+
+    @classmethod
+    def summary(cls):
+        return {name: histogram.summary() for name, histogram in sorted(cls.histograms.items())}
+
+    @classmethod
+    def overlay_lines(cls):
+        """
+        Короткие строки для отображения поверх изображения: последнее значение, медиана и p90 в мс.
+        """
+        return [
+            f"{name}: {h.last * 1e3:.1f} ms (p50 {h.percentile(0.5) * 1e3:.1f}, p90 {h.percentile(0.9) * 1e3:.1f}, n={h.count})"
+            for name, h in sorted(cls.histograms.items())
+        ]
+
+    @classmethod
+    def reset(cls):
+        cls.histograms.clear()
+
+    @classmethod
+    def dump(cls, file_name=None):
+        """
+        Сохраняет статистику в JSON. Без замеров файл не создаётся.
+        """
+        if not cls.histograms:
+            return None
+        if file_name is None:
+            file_name = os.environ.get("POINTS_TIMING_FILE") or \
+                f"logs/timing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        directory = os.path.dirname(file_name)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(file_name, 'w', encoding='utf-8') as json_file:
+            json.dump(cls.summary(), json_file, indent=4, ensure_ascii=False)
+        return file_name
+
+def timed(name):
+    """
+    Декоратор замера длительности вызова под именем name.
+    При выключенных замерах функция возвращается без обёртки.
+    """
+    def decorator(function):
+        if not Instrumentation.enabled:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                Instrumentation.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+if Instrumentation.enabled:
+    atexit.register(Instrumentation.dump)
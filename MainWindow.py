@@ -1,14 +1,21 @@
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QPushButton, 
                              QComboBox, QVBoxLayout, QHBoxLayout, QWidget, 
-                             QMessageBox)
-from PyQt5.QtCore import Qt, QPoint
+                             QMessageBox, QProgressBar, QSlider)
+from PyQt5.QtCore import Qt, QPoint, QThreadPool
 import cv2
 from DisplayUtils import DisplayUtils
 from ReferencePointsManager import ReferencePointsManager
 from ReferencePointsSelector import Selector
 from CoordinateConverter import CoordinateConverter
-from Point import Point
+from CalibrationStore import Calibration
+from FrameCapture import OpenCVFrameCapture
+from Point import Point, PointSet
 from ZoomingLabel import ZoomingLabel
+from ImagePyramid import ImagePyramid
+from MatchingWorker import MatchingWorker
+from Instrumentation import timed
+from AccuracyEvaluator import AccuracyEvaluator
+from CrossValidation import CrossValidator
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -17,14 +24,18 @@ class MainWindow(QMainWindow):
         self.DOT_RADIUS = 5
         self.IS_ANALYTICS = True
 
-        self.points = []
+        self.points = PointSet()
         self.image_cv = None
         self.image = None
+        self.video = None
+        self.camera_id = None
+        self.base_pixmap = None
         self.scale_factor = 1
         self.ref_points_manager = ReferencePointsManager()
         self.converter = CoordinateConverter()
         self.target_point = None
         self.is_selecting_point = False
+        self.matching_worker = None
         
         self.setWindowTitle("Выбор реперных точек")
 
@@ -40,6 +51,18 @@ class MainWindow(QMainWindow):
         self.image_label.setText("Выберите изображение или видео")
         self.image_label.setAlignment(Qt.AlignCenter)
 
+        # Ползунок выбора кадра (виден только для видео)
+        self.frame_slider = QSlider(Qt.Horizontal, self)
+        self.frame_slider.valueChanged.connect(self.show_frame)
+        self.frame_slider.hide()
+        self.frame_label = QLabel(self)
+        self.frame_label.hide()
+
+        self.left_layout = QVBoxLayout()
+        self.left_layout.addWidget(self.image_label, 1)
+        self.left_layout.addWidget(self.frame_slider)
+        self.left_layout.addWidget(self.frame_label, alignment=Qt.AlignCenter)
+
         # Правая часть - элементы управления
         self.right_layout = QVBoxLayout()
         self.right_layout.addStretch()
@@ -63,6 +86,17 @@ class MainWindow(QMainWindow):
         self.select_point_btn = QPushButton("Выбрать опорные точки", self)
         self.select_point_btn.clicked.connect(self.select_points)
         self.right_layout.addWidget(self.select_point_btn, alignment=Qt.AlignCenter)
+
+        # Ход фонового поиска по шаблону и кнопка его отмены (видны только во время поиска)
+        self.matching_progress_bar = QProgressBar(self)
+        self.matching_progress_bar.setFormat("Поиск по шаблону: %p%")
+        self.matching_progress_bar.hide()
+        self.right_layout.addWidget(self.matching_progress_bar)
+
+        self.cancel_matching_btn = QPushButton("Отменить поиск", self)
+        self.cancel_matching_btn.clicked.connect(self.cancel_matching)
+        self.cancel_matching_btn.hide()
+        self.right_layout.addWidget(self.cancel_matching_btn, alignment=Qt.AlignCenter)
         
         self.points_count_label = QLabel(self)
         self.points_count_label.setText("Введено опорных точек: 0")
@@ -73,16 +107,35 @@ class MainWindow(QMainWindow):
         self.select_target_point_btn.clicked.connect(self.select_target_point)
         self.right_layout.addWidget(self.select_target_point_btn, alignment=Qt.AlignCenter)
 
+        # Кнопки для сохранения и загрузки калибровки
+        self.save_calibration_btn = QPushButton("Сохранить калибровку", self)
+        self.save_calibration_btn.clicked.connect(self.save_calibration)
+        self.right_layout.addWidget(self.save_calibration_btn, alignment=Qt.AlignCenter)
+
+        self.load_calibration_btn = QPushButton("Загрузить калибровку", self)
+        self.load_calibration_btn.clicked.connect(self.load_calibration)
+        self.right_layout.addWidget(self.load_calibration_btn, alignment=Qt.AlignCenter)
+
         if self.IS_ANALYTICS:
             # Кнопка для получения и сохранения подробной информации
             self.analytics_btn = QPushButton("Подробная информация", self)
             self.analytics_btn.clicked.connect(self.analytics_select_target_point)
             self.right_layout.addWidget(self.analytics_btn, alignment=Qt.AlignCenter)
+
+            # Кнопка для проверки калибровки по файлу контрольных точек
+            self.checkpoints_btn = QPushButton("Проверить по контрольным точкам", self)
+            self.checkpoints_btn.clicked.connect(self.evaluate_checkpoints)
+            self.right_layout.addWidget(self.checkpoints_btn, alignment=Qt.AlignCenter)
+
+            # Кнопка для перекрёстной проверки реперных точек
+            self.cross_validation_btn = QPushButton("Перекрёстная проверка точек", self)
+            self.cross_validation_btn.clicked.connect(self.cross_validate)
+            self.right_layout.addWidget(self.cross_validation_btn, alignment=Qt.AlignCenter)
         
         self.right_layout.addStretch()
 
         # Добавляем элементы в основной layout
-        self.main_layout.addWidget(self.image_label, 2)
+        self.main_layout.addLayout(self.left_layout, 2)
         self.main_layout.addLayout(self.right_layout, 1)
 
     def keyPressEvent(self, event):
@@ -111,40 +164,150 @@ class MainWindow(QMainWindow):
         """
         Загрузка изображения через QFileDialog.
         """
-        self.points = []
+        self.cancel_matching()
+        self.points = PointSet()
+        self.camera_id = None
+        self.converter.invalidate()
 
         try:
             file_name = DisplayUtils.open_image_file()
             if file_name:
-                self.image_cv = cv2.imread(file_name)
-                self.image = DisplayUtils.from_cv_to_qimg(self.image_cv)
-                self.display_image(self.image)
+                self.open_file(file_name)
         except Exception as e:
             DisplayUtils.show_message(str(e))
 
+    @timed("load_image")
+    def open_file(self, file_name):
+        """
+        Загрузка выбранного изображения или видео (без времени ожидания в диалоге выбора файла).
+        """
+        self.close_video()
+        if DisplayUtils.is_video_file(file_name):
+            self.load_video(file_name)
+        else:
+            self.set_image(cv2.imread(file_name))
+
+    def set_image(self, image_cv):
+        """
+        Делает image_cv текущим изображением: отображает его и строит пирамиду для масштабирования.
+        """
+        if image_cv is None:
+            raise Exception('Ошибка чтения файла')
+        self.image_cv = image_cv
+        self.image = DisplayUtils.from_cv_to_qimg(self.image_cv)
+        self.display_image(self.image)
+        self.image_label.setPyramid(ImagePyramid(self.image_cv), self.scale_factor)
+
+    def load_video(self, file_name):
+        """
+        Открывает видео без полного декодирования: показывается первый кадр,
+        остальные декодируются при выборе ползунком.
+        """
+        self.video = OpenCVFrameCapture(file_name)
+        if not self.video.is_seekable():
+            self.close_video()
+            raise Exception('Не удалось определить число кадров видео')
+
+        self.frame_slider.blockSignals(True)
+        self.frame_slider.setRange(0, self.video.frame_count - 1)
+        self.frame_slider.setValue(0)
+        self.frame_slider.blockSignals(False)
+        self.frame_slider.show()
+        self.frame_label.show()
+        self.show_frame(0)
+
+    @timed("show_frame")
+    def show_frame(self, index):
+        """
+        Показывает кадр видео с номером index. Реперные точки сохраняются: камера считается неподвижной.
+        """
+        if self.video is None:
+            return
+        try:
+            self.set_image(self.video.get_frame_at(index))
+        except Exception as e:
+            DisplayUtils.show_message(str(e))
+            return
+        self.frame_label.setText(f"Кадр {index + 1} из {self.video.frame_count}")
+        self.draw_points()
+
+    def close_video(self):
+        if self.video is not None:
+            self.video.release()
+            self.video = None
+        self.frame_slider.hide()
+        self.frame_label.hide()
+
+    def save_calibration(self):
+        """
+        Сохранение реперных точек и подобранной гомографии в файл калибровки.
+        """
+        try:
+            camera_id = DisplayUtils.ask_camera_id(self.camera_id or "")
+            if not camera_id:
+                return
+            calibration = Calibration.from_points(self.points, self.image_cv, camera_id)
+            file_name = DisplayUtils.save_calibration_file()
+            if file_name:
+                calibration.save(file_name)
+                self.camera_id = camera_id
+        except Exception as e:
+            DisplayUtils.show_message(str(e))
+
+    def load_calibration(self):
+        """
+        Загрузка реперных точек и гомографии из файла калибровки без повторного подбора.
+        Если камера калибровки отличается от выбранной для текущего изображения, показывается
+        предупреждение; камера калибровки становится текущей.
+        """
+        try:
+            file_name = DisplayUtils.open_calibration_file()
+            if not file_name:
+                return
+            calibration = Calibration.load(file_name)
+            try:
+                calibration.check_camera(self.camera_id)
+            except ValueError as e:
+                DisplayUtils.show_message(str(e))
+            if calibration.camera_id is not None:
+                self.camera_id = calibration.camera_id
+            self.points = calibration.reference_points
+            self.points_changed()
+            calibration.activate()
+
+            if self.image_cv is not None and not calibration.is_current(self.image_cv):
+                DisplayUtils.show_message("Калибровка была выполнена на другом изображении.")
+        except Exception as e:
+            DisplayUtils.show_message(str(e))
+
+    def points_changed(self):
+        """
+        Вызывается при любом изменении набора реперных точек: сбрасывает гомографию и перерисовывает точки.
+        """
+        self.converter.invalidate()
+        self.draw_points()
+
+    @timed("draw_points")
     def draw_points(self):
         """
         Метод для отображения всех реперных точек на изображении.
+        Изображение не перерисовывается: точки рисуются на отдельном слое в разрешении отображения.
         """
-        if self.image_cv is None:
+        if self.base_pixmap is None:
             return
         
-        display_image = self.image_cv.copy()
-        radius = int(self.DOT_RADIUS / self.scale_factor)
-
-        for point in self.points:
-            display_image = DisplayUtils.draw_point(display_image, point, radius)
-
-        display_image = DisplayUtils.from_cv_to_qimg(display_image)
-        self.display_image(display_image)
+        overlay = DisplayUtils.draw_points_overlay(self.base_pixmap.size(), self.points, self.scale_factor, self.DOT_RADIUS)
+        self.image_label.setOverlay(overlay)
         self.update_points_count()
 
+    @timed("display_image")
     def display_image(self, image):
         """
         Отображение изображения в QLabel с уменьшением до 1280x720, если изображение больше.
+        Уменьшенное изображение сохраняется и переиспользуется при отрисовке точек.
         """
-        scaled_pixmap, self.scale_factor = DisplayUtils.get_scaled_pixmap(image, max_width=1280, max_height=720)
-        self.image_label.setPixmap(scaled_pixmap)
+        self.base_pixmap, self.scale_factor = DisplayUtils.get_scaled_pixmap(image, max_width=1280, max_height=720)
+        self.image_label.setPixmap(self.base_pixmap)
         self.image_label.update()
 
     def end_select_points(self):
@@ -175,17 +338,93 @@ class MainWindow(QMainWindow):
                     self.finish_select_btn.clicked.connect(self.end_select_points)
                     self.right_layout.addWidget(self.finish_select_btn, alignment=Qt.AlignCenter)              
             elif method == Selector.Auto.name:
-                self.ref_points_manager.set_selector(Selector.Auto.value)
+                self.ref_points_manager.set_selector(Selector.Auto.instance)
                 self.ref_points_manager.select_point(self.image)
             elif method == Selector.Template.name:
                 
-                template = DisplayUtils.open_template_input_window(self.image)
+                if self.matching_worker is not None:
+                    if self.matching_worker.is_cancelled():
+                        DisplayUtils.show_message("Отменённый поиск по шаблону ещё завершается.")
+                    else:
+                        DisplayUtils.show_message("Поиск по шаблону уже выполняется.")
+                    return
+                
+                template = DisplayUtils.open_template_input_window(self.image, self.image_cv)
                 if template is not False:
-                    self.ref_points_manager.set_selector(Selector.Template.value)
-                    template_points = self.ref_points_manager.select_points(self.image_cv, template, self.scale_factor)
-                    if template_points is not None:
-                        self.points += template_points
-                        self.draw_points()       
+                    self.ref_points_manager.set_selector(Selector.Template.instance)
+                    self.start_matching(template)
+
+    def start_matching(self, template):
+        """
+        Запускает поиск по шаблону в фоновом потоке. Окно и масштабирование изображения
+        остаются доступными, найденные точки добавляются по завершении поиска.
+        """
+        worker = MatchingWorker(self.ref_points_manager.selector, self.image_cv, template, self.scale_factor)
+        worker.signals.progress.connect(self.matching_progress)
+        worker.signals.finished.connect(self.matching_finished)
+        worker.signals.cancelled.connect(self.matching_stopped)
+        worker.signals.failed.connect(self.matching_failed)
+        self.matching_worker = worker
+
+        self.matching_progress_bar.setRange(0, 0)
+        self.matching_progress_bar.show()
+        self.cancel_matching_btn.show()
+        QThreadPool.globalInstance().start(worker)
+
+    def is_current_matching(self):
+        """
+        Сигнал пришёл от текущего поиска, а не от отменённого ранее.
+        """
+        return self.matching_worker is not None and self.sender() is self.matching_worker.signals
+
+    def matching_progress(self, done, total):
+        if not self.is_current_matching() or self.matching_worker.is_cancelled():
+            return
+        self.matching_progress_bar.setRange(0, max(total, 1))
+        self.matching_progress_bar.setValue(done)
+
+    def matching_finished(self, template_points):
+        if not self.is_current_matching():
+            return
+        cancelled = self.matching_worker.is_cancelled()
+        self.end_matching()
+        if template_points is not None and not cancelled:
+            self.points += template_points
+            self.points_changed()
+
+    def matching_failed(self, message):
+        if not self.is_current_matching():
+            return
+        cancelled = self.matching_worker.is_cancelled()
+        self.end_matching()
+        if not cancelled:
+            DisplayUtils.show_message(message)
+
+    def matching_stopped(self):
+        if self.is_current_matching():
+            self.end_matching()
+
+    def cancel_matching(self):
+        """
+        Отменяет выполняющийся поиск по шаблону. Результаты отменённого поиска не добавляются.
+        Ссылка на поиск сохраняется до его сигнала cancelled, finished или failed,
+        поэтому новый поиск не запускается, пока отменённый ещё выполняется.
+        """
+        if self.matching_worker is not None:
+            self.matching_worker.cancel()
+            self.hide_matching_progress()
+
+    def end_matching(self):
+        self.matching_worker = None
+        self.hide_matching_progress()
+
+    def hide_matching_progress(self):
+        self.matching_progress_bar.hide()
+        self.cancel_matching_btn.hide()
+
+    def closeEvent(self, event):
+        self.cancel_matching()
+        super().closeEvent(event)
                 
     def clicked_point(self, pos):
         """
@@ -203,12 +442,11 @@ class MainWindow(QMainWindow):
         if nearest_point:
             updated_point = DisplayUtils.open_coords_input_window(nearest_point, update=True)
             if updated_point:
-                index = self.points.index(nearest_point)
-                self.points[index] = updated_point
+                self.points.update(nearest_point, updated_point)
             else:
                 self.points.remove(nearest_point)  
                 
-            self.draw_points() 
+            self.points_changed()
             self.update_points_count()
             self.end_select_points()
             return
@@ -219,7 +457,7 @@ class MainWindow(QMainWindow):
         
         if point:
             self.points.append(point)
-            self.draw_points()
+            self.points_changed()
             self.update_points_count()
 
         self.end_select_points()
@@ -228,12 +466,7 @@ class MainWindow(QMainWindow):
         """
         Находит ближайшую точку к заданным координатам в пределах радиуса.
         """
-        for point in self.points:
-            px, py = point.local_coords
-            # Проверка расстояния
-            if ((px - x) ** 2 + (py - y) ** 2) <= ((self.SELECTION_RADIUS / self.scale_factor) ** 2):
-                return point
-        return None
+        return self.points.nearest(x, y, self.SELECTION_RADIUS / self.scale_factor)
                 
     def select_target_point(self):
         """
@@ -319,6 +552,47 @@ class MainWindow(QMainWindow):
             msg.setText(str(e))
             msg.setWindowTitle("Ошибка")
 
+    def evaluate_checkpoints(self):
+        """
+        Проверка текущих реперных точек по файлу контрольных точек с известными координатами.
+        """
+        try:
+            file_name = DisplayUtils.open_checkpoints_file()
+            if not file_name:
+                return
+            summary = AccuracyEvaluator(self.points).evaluate_file(file_name).summary()
+            DisplayUtils.show_message(
+                f"Контрольных точек: {summary['count']}\n"
+                f"Среднее отклонение: {summary.get('mean_deviation', 0):.4f}\n"
+                f"Медиана отклонения: {summary.get('median_deviation', 0):.4f}\n"
+                f"Максимальное отклонение: {summary.get('max_deviation', 0):.4f} (точка {summary.get('worst_checkpoint')})\n"
+                f"Среднее отношение отклонения к длине пикселя: {summary.get('mean_deviation_to_pixel_ratio', 0):.4f}"
+            )
+        except Exception as e:
+            DisplayUtils.show_message(str(e))
+
+    def cross_validate(self):
+        """
+        Leave-one-out проверка реперных точек: гомография подбирается без каждой точки,
+        выводится отклонение отложенных точек и точка с наибольшим отклонением.
+        """
+        try:
+            summary = CrossValidator(self.points).leave_one_out().summary()
+            worst = summary.get('worst_checkpoint')
+            worst_text = ""
+            if worst is not None:
+                local_coords = CoordinateConverter.reference_arrays(self.points)[0][worst]
+                worst_text = f" (точка {worst + 1}, локальные координаты {tuple(local_coords.tolist())})"
+            DisplayUtils.show_message(
+                f"Реперных точек: {summary['count']}, не удалось подобрать: {summary['failed']}\n"
+                f"Среднее отклонение: {summary.get('mean_deviation', 0):.4f}\n"
+                f"Медиана отклонения: {summary.get('median_deviation', 0):.4f}\n"
+                f"Максимальное отклонение: {summary.get('max_deviation', 0):.4f}{worst_text}\n"
+                f"Среднее отношение отклонения к длине пикселя: {summary.get('mean_deviation_to_pixel_ratio', 0):.4f}"
+            )
+        except Exception as e:
+            DisplayUtils.show_message(str(e))
+
     @staticmethod
     def run():
         """
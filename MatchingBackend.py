@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+
+class MatchingBackend:
+    """
+    Способ вычисления карты совпадений TM_CCOEFF_NORMED шаблона на изображении.
+    """
+    name = None
+
+    def match(self, image, template):
+        raise NotImplementedError
+
+class SpatialMatchingBackend(MatchingBackend):
+    """
+    Стандартный cv2.matchTemplate, используется по умолчанию. Для больших шаблонов
+    OpenCV сам переходит на DFT, и на замерах benchmarks/matching_backends.py
+    (до 1920x1080, доля площади шаблона до 0.5) он не уступал FFTMatchingBackend.
+    """
+    name = "spatial"
+
+    def match(self, image, template):
+        return cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+
+class FFTMatchingBackend(MatchingBackend):
+    """
+    Нормированная взаимная корреляция в частотной области.
+    Числитель считается через БПФ, суммы по окнам - через интегральные изображения,
+    результат совпадает с TM_CCOEFF_NORMED. Выбирается явно, если бенчмарк
+    на целевой машине покажет, что он быстрее cv2.matchTemplate.
+    """
+    name = "fft"
+
+    def match(self, image, template):
+        image = image.reshape(image.shape[:2] + (-1,)).astype(np.float64)
+        template = template.reshape(template.shape[:2] + (-1,)).astype(np.float64)
+
+        height, width, channels = image.shape
+        th, tw = template.shape[:2]
+        n = th * tw
+        result_shape = (height - th + 1, width - tw + 1)
+        fft_shape = (cv2.getOptimalDFTSize(height), cv2.getOptimalDFTSize(width))
+
+        template = template - template.mean(axis=(0, 1))
+        template_norm = np.sum(template ** 2)
+
+        numerator = np.zeros(result_shape, dtype=np.float64)
+        window_variance = np.zeros(result_shape, dtype=np.float64)
+        for c in range(channels):
+            image_fft = np.fft.rfft2(image[:, :, c], fft_shape)
+            template_fft = np.fft.rfft2(template[:, :, c], fft_shape)
+            correlation = np.fft.irfft2(image_fft * np.conj(template_fft), fft_shape)
+            numerator += correlation[:result_shape[0], :result_shape[1]]
+
+            window_sum = self.window_sums(image[:, :, c], th, tw)
+            window_sum_sq = self.window_sums(image[:, :, c] ** 2, th, tw)
+            window_variance += window_sum_sq - window_sum ** 2 / n
+
+        denominator = np.sqrt(np.maximum(window_variance, 0) * template_norm)
+        result = np.zeros(result_shape, dtype=np.float64)
+        valid = denominator > 1e-6 * max(template_norm, 1)
+        result[valid] = numerator[valid] / denominator[valid]
+        return np.clip(result, -1, 1).astype(np.float32)
+
+    @staticmethod
+    def window_sums(image, th, tw):
+        """
+        Суммы по всем окнам размера (th, tw) через интегральное изображение.
+        """
+        integral = cv2.integral(image, sdepth=cv2.CV_64F)
+        return integral[th:, tw:] - integral[:-th, tw:] - integral[th:, :-tw] + integral[:-th, :-tw]
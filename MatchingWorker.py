@@ -0,0 +1,52 @@
+import threading
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+from Point import PointSet
+from ReferencePointsSelector import MatchingCancelled
+
+class MatchingSignals(QObject):
+    """
+    Сигналы фонового поиска шаблона. Испускаются из рабочего потока
+    и доставляются в поток интерфейса через очередь событий.
+    """
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+class MatchingWorker(QRunnable):
+    """
+    Поиск шаблона в QThreadPool, чтобы окно не блокировалось.
+    Найденные точки передаются сигналом finished; ни набор точек окна, ни набор точек
+    селектора (общего для всех поисков) не изменяются.
+    selector: TemplateMatchingSelector (передаётся явно, чтобы смена селектора
+        в ReferencePointsManager не влияла на уже запущенный поиск).
+    """
+    def __init__(self, selector, image, template, scale_factor=1):
+        super().__init__()
+        self.selector = selector
+        self.image = image
+        self.template = template
+        self.scale_factor = scale_factor
+        self.signals = MatchingSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """
+        Просит прервать поиск: оставшиеся фрагменты не считаются, испускается cancelled.
+        """
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def run(self):
+        try:
+            coords = self.selector.find_matches(self.image, self.template, progress=self.signals.progress.emit,
+                                                cancel_event=self.cancel_event)
+            points = PointSet.from_arrays(coords)
+        except MatchingCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(points)
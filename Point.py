@@ -1,26 +1,390 @@
+import json
 import numpy as np
 
 class Point:
+    __slots__ = ('_owner', '_index', '_local', '_global')
+
     def __init__(self, local_coords = None, global_coords = None):
         """
         local_coords: Координаты точки на изображении (локальные)
         global_coords: Глобальные координаты этой точки на поле
+
+        Пока точка не добавлена в PointSet, координаты хранятся в ней самой.
+        После добавления точка становится представлением строки массивов набора.
         """
-        self.local_coords = local_coords
-        self.global_coords = global_coords
-        
+        self._owner = None
+        self._index = -1
+        self._local = local_coords
+        self._global = global_coords
+
+    @property
+    def local_coords(self):
+        if self._owner is None:
+            return self._local
+        return self._owner._local[self._index]
+
+    @local_coords.setter
+    def local_coords(self, value):
+        if self._owner is None:
+            self._local = value
+        else:
+            self._owner._set_slot(self._index, value, self.global_coords)
+
+    @property
+    def global_coords(self):
+        if self._owner is None:
+            return self._global
+        coords = self._owner._global[self._index]
+        if np.isnan(coords[0]):
+            return None
+        return coords
+
+    @global_coords.setter
+    def global_coords(self, value):
+        if self._owner is None:
+            self._global = value
+        else:
+            self._owner._set_slot(self._index, self.local_coords, value)
+
     def __repr__(self):
         return f"Point (local_coords={self.local_coords}, global_coords={self.global_coords})"
-    
+
     def has_global(self):
         if self.global_coords is not None: return True
         return False
-    
+
     def to_dict(self):
         """
         Преобразует объект Point в словарь для последующей сериализации в JSON.
         """
+        local_coords = self.local_coords
+        global_coords = self.global_coords
         return {
-            "local_coords": self.local_coords.tolist() if isinstance(self.local_coords, np.ndarray) else self.local_coords,
-            "global_coords": self.global_coords.tolist() if isinstance(self.global_coords, np.ndarray) else self.global_coords
-        }
\ No newline at end of file
+            "local_coords": local_coords.tolist() if isinstance(local_coords, np.ndarray) else local_coords,
+            "global_coords": global_coords.tolist() if isinstance(global_coords, np.ndarray) else global_coords
+        }
+
+class PointSet:
+    """
+    Компактный набор точек: локальные и глобальные координаты хранятся в непрерывных
+    массивах float64, удалённые точки помечаются в маске валидности.
+    Отсутствующие глобальные координаты хранятся как NaN.
+    Для поиска ближайшей точки поддерживается сеточный индекс по локальным координатам.
+    """
+    def __init__(self, capacity=16):
+        capacity = max(int(capacity), 1)
+        self._local = np.empty((capacity, 2), dtype=np.float64)
+        self._global = np.full((capacity, 2), np.nan, dtype=np.float64)
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._size = 0      # занятые слоты, включая удалённые
+        self._count = 0     # действующие точки
+        self._version = 0
+        self._cache = None
+        self._grid = None
+        self._cell_size = None
+
+    @classmethod
+    def from_arrays(cls, local_coords, global_coords=None):
+        """
+        Создаёт набор из массивов координат формы (N, 2).
+        """
+        local_coords = np.asarray(local_coords, dtype=np.float64).reshape(-1, 2)
+        point_set = cls(capacity=len(local_coords))
+        point_set._append_arrays(local_coords, global_coords)
+        return point_set
+
+    @classmethod
+    def from_points(cls, points):
+        """
+        Создаёт набор из произвольной коллекции Point.
+        """
+        if isinstance(points, PointSet):
+            return points
+        point_set = cls()
+        point_set.extend(points)
+        return point_set
+
+    @classmethod
+    def from_dicts(cls, records):
+        """
+        Создаёт набор из словарей формата Point.to_dict.
+        """
+        local_coords = np.array([record["local_coords"] for record in records], dtype=np.float64).reshape(-1, 2)
+        global_coords = np.array(
+            [record["global_coords"] if record.get("global_coords") is not None else (np.nan, np.nan) for record in records],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+        return cls.from_arrays(local_coords, global_coords)
+
+    @classmethod
+    def load_json(cls, file_name):
+        """
+        Загружает точки из JSON: список словарей Point.to_dict или файл анализа с ключом "ref_points".
+        """
+        with open(file_name, 'r', encoding='utf-8') as json_file:
+            data = json.load(json_file)
+        if isinstance(data, dict):
+            data = data["ref_points"]
+        return cls.from_dicts(data)
+
+    def to_dicts(self):
+        return [point.to_dict() for point in self]
+
+    def save_json(self, file_name):
+        with open(file_name, 'w', encoding='utf-8') as json_file:
+            json.dump(self.to_dicts(), json_file, indent=4, ensure_ascii=False)
+
+    @property
+    def version(self):
+        """
+        Счётчик изменений набора.
+        """
+        return self._version
+
+    def _changed(self):
+        self._version += 1
+        self._cache = None
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._valid)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+
+        local_coords = np.empty((capacity, 2), dtype=np.float64)
+        global_coords = np.full((capacity, 2), np.nan, dtype=np.float64)
+        valid = np.zeros(capacity, dtype=bool)
+        local_coords[:self._size] = self._local[:self._size]
+        global_coords[:self._size] = self._global[:self._size]
+        valid[:self._size] = self._valid[:self._size]
+        self._local, self._global, self._valid = local_coords, global_coords, valid
+
+    def _set_slot(self, index, local_coords, global_coords):
+        old_cell = self._cell_of(self._local[index])
+        self._local[index] = local_coords
+        self._global[index] = np.nan if global_coords is None else global_coords
+        if self._grid is not None:
+            new_cell = self._cell_of(self._local[index])
+            if new_cell != old_cell:
+                self._grid_remove(old_cell, index)
+                self._grid.setdefault(new_cell, []).append(index)
+        self._changed()
+
+    def _cell_of(self, coords):
+        if self._grid is None:
+            return None
+        return (int(coords[0] // self._cell_size), int(coords[1] // self._cell_size))
+
+    def _grid_remove(self, cell, index):
+        bucket = self._grid[cell]
+        bucket.remove(index)
+        if not bucket:
+            del self._grid[cell]
+
+    def _build_grid(self, cell_size):
+        """
+        Сеточный индекс: ячейка размера cell_size -> список слотов точек в ней.
+        """
+        slots = self._slots()
+        cells = np.floor_divide(self._local[slots], cell_size).astype(np.int64)
+        grid = {}
+        for cx, cy, index in zip(cells[:, 0].tolist(), cells[:, 1].tolist(), slots.tolist()):
+            grid.setdefault((cx, cy), []).append(index)
+        self._grid = grid
+        self._cell_size = cell_size
+
+    def _append_arrays(self, local_coords, global_coords=None):
+        n = len(local_coords)
+        self._reserve(n)
+        start, end = self._size, self._size + n
+        self._local[start:end] = local_coords
+        # Слоты могли остаться от удалённых точек, поэтому NaN записывается явно
+        self._global[start:end] = np.nan if global_coords is None else global_coords
+        self._valid[start:end] = True
+        self._size = end
+        self._count += n
+        # Индекс перестраивается при следующем запросе
+        self._grid = None
+        self._changed()
+
+    def _view(self, index):
+        point = Point.__new__(Point)
+        point._owner = self
+        point._index = index
+        point._local = None
+        point._global = None
+        return point
+
+    def _slot_of(self, point):
+        if point._owner is not self or not self._valid[point._index]:
+            raise ValueError(f"{point} не входит в набор точек")
+        return point._index
+
+    def _slots(self):
+        if self._count == self._size:
+            return np.arange(self._size)
+        return np.flatnonzero(self._valid[:self._size])
+
+    def append(self, point):
+        """
+        Добавляет точку в набор и возвращает её представление.
+        Самостоятельная точка сама становится представлением, точка из другого набора копируется.
+        """
+        self._reserve(1)
+        index = self._size
+        self._local[index] = point.local_coords
+        self._global[index] = np.nan if point.global_coords is None else point.global_coords
+        self._valid[index] = True
+        self._size += 1
+        self._count += 1
+        if self._grid is not None:
+            self._grid.setdefault(self._cell_of(self._local[index]), []).append(index)
+        self._changed()
+
+        if point._owner is None:
+            point._owner = self
+            point._index = index
+            point._local = None
+            point._global = None
+            return point
+        return self._view(index)
+
+    def extend(self, points):
+        """
+        Добавляет в набор несколько точек. Наборы PointSet копируются целиком массивами.
+        """
+        if isinstance(points, PointSet):
+            local_coords, global_coords = points.local_coords, points.global_coords
+            self._append_arrays(local_coords, global_coords)
+        else:
+            for point in points:
+                self.append(point)
+
+    def __iadd__(self, points):
+        self.extend(points)
+        return self
+
+    def remove(self, point):
+        """
+        Удаляет точку из набора (помечает слот недействительным).
+        """
+        index = self._slot_of(point)
+        self._valid[index] = False
+        self._count -= 1
+        if self._grid is not None:
+            self._grid_remove(self._cell_of(self._local[index]), index)
+        self._changed()
+
+    def update(self, point, new_point):
+        """
+        Заменяет координаты точки набора координатами new_point.
+        """
+        index = self._slot_of(point)
+        if new_point is not point:
+            self._set_slot(index, new_point.local_coords, new_point.global_coords)
+
+    def clear(self):
+        self._valid[:self._size] = False
+        self._global[:self._size] = np.nan
+        self._size = 0
+        self._count = 0
+        self._grid = None
+        self._changed()
+
+    def nearest(self, x, y, radius):
+        """
+        Ближайшая к (x, y) точка не дальше radius или None.
+        Просматриваются только ячейки сетки, пересекающие круг поиска.
+        """
+        if self._count == 0:
+            return None
+        # Размер ячейки подстраивается под радиус запроса, чтобы просматривать немного ячеек
+        if self._grid is None or not (radius / 4 <= self._cell_size <= radius * 4):
+            self._build_grid(max(float(radius), 1.0))
+
+        size = self._cell_size
+        x0, x1 = int((x - radius) // size), int((x + radius) // size)
+        y0, y1 = int((y - radius) // size), int((y + radius) // size)
+        candidates = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                candidates += self._grid.get((cx, cy), ())
+        if not candidates:
+            return None
+
+        candidates = np.array(candidates)
+        distances = np.sum((self._local[candidates] - (x, y)) ** 2, axis=1)
+        best = int(np.argmin(distances))
+        if distances[best] > radius ** 2:
+            return None
+        return self._view(int(candidates[best]))
+
+    def index(self, point):
+        """
+        Порядковый номер точки среди действующих точек набора.
+        """
+        index = self._slot_of(point)
+        if self._count == self._size:
+            return index
+        return int(np.count_nonzero(self._valid[:index]))
+
+    def __contains__(self, point):
+        return isinstance(point, Point) and point._owner is self and bool(self._valid[point._index])
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __iter__(self):
+        for index in self._slots():
+            yield self._view(int(index))
+
+    def __getitem__(self, position):
+        return self._view(int(self._slots()[position]))
+
+    def __setitem__(self, position, point):
+        index = int(self._slots()[position])
+        self._set_slot(index, point.local_coords, point.global_coords)
+
+    def __repr__(self):
+        return f"PointSet ({self._count} points)"
+
+    @property
+    def local_coords(self):
+        """
+        Массив локальных координат действующих точек формы (N, 2).
+        """
+        if self._count == self._size:
+            return self._local[:self._size]
+        return self._local[:self._size][self._valid[:self._size]]
+
+    @property
+    def global_coords(self):
+        """
+        Массив глобальных координат действующих точек формы (N, 2), NaN для точек без глобальных координат.
+        """
+        if self._count == self._size:
+            return self._global[:self._size]
+        return self._global[:self._size][self._valid[:self._size]]
+
+    def has_global(self):
+        """
+        Маска действующих точек, для которых заданы глобальные координаты.
+        """
+        return ~np.isnan(self.global_coords[:, 0])
+
+    def reference_arrays(self):
+        """
+        Локальные и глобальные координаты точек, пригодных в качестве реперных.
+        Результат переиспользуется, пока набор не изменится.
+        """
+        if self._cache is None:
+            local_coords, global_coords = self.local_coords, self.global_coords
+            mask = ~np.isnan(global_coords[:, 0])
+            if not mask.all():
+                local_coords, global_coords = local_coords[mask], global_coords[mask]
+            self._cache = (local_coords, global_coords)
+        return self._cache
@@ -10,11 +10,12 @@ class ReferencePointsManager:
         """
         self.selector = selector
 
-    def select_points(self, image, template=None, scale_factor=1):
+    def select_points(self, image, template=None, scale_factor=1, **kwargs):
         """
         Выполняем выбор точек через установленный селектор.
+        kwargs передаются селектору (например, progress и cancel_event).
         """
-        return self.selector.select_points(image, template, scale_factor)
+        return self.selector.select_points(image, template, scale_factor, **kwargs)
 
     def get_points(self):
         """
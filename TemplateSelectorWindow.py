@@ -1,14 +1,16 @@
 from PyQt5.QtCore import Qt, QPoint, QRect, QSize
 from PyQt5.QtWidgets import QLabel, QRubberBand, QVBoxLayout, QHBoxLayout, QPushButton, QDialog
+import numpy as np
 from DisplayUtils import DisplayUtils
 
 class TemplateSelectorWindow(QDialog):
     """
     Окно для выделения шаблона на изображении.
     """
-    def __init__(self, image):
+    def __init__(self, image, image_cv=None):
         super().__init__()
         self.image = image
+        self.image_cv = image_cv
         self.template = None
         """
         Используется магическая QRubberBand
@@ -50,7 +52,10 @@ class TemplateSelectorWindow(QDialog):
             
             self.template = self.crop_image(rect)
             
-            template_window = TemplateWindow(self.template)
+            template_image = self.template
+            if isinstance(template_image, np.ndarray):
+                template_image = DisplayUtils.from_cv_to_qimg(template_image)
+            template_window = TemplateWindow(template_image)
             template_window.exec_()
             
             if template_window.accept_template:
@@ -61,12 +66,15 @@ class TemplateSelectorWindow(QDialog):
     def get_template(self):
         if self.template is None:
             return False
-        
+
+        if isinstance(self.template, np.ndarray):
+            return self.template
         return DisplayUtils.from_qimg_to_cv(self.template) 
             
     def crop_image(self, rect):
         """
         Метод для вырезания области изображения, с учётом масштаба.
+        Если известен массив OpenCV, шаблон вырезается из него срезом, без обхода через QImage.
         """
         # Переводим координаты выделенной области обратно к оригинальному изображению
         x1 = int(rect.x() / self.scale_factor)
@@ -75,6 +83,8 @@ class TemplateSelectorWindow(QDialog):
         y2 = int((rect.y() + rect.height()) / self.scale_factor)
 
         # Обрезаем исходное изображение
+        if self.image_cv is not None:
+            return self.image_cv[y1:y2, x1:x2].copy()
         template = self.image.copy(x1, y1, x2 - x1, y2 - y1)
         return template  
             
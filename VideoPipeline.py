@@ -0,0 +1,118 @@
+import csv
+import json
+import numpy as np
+from CoordinateConverter import CoordinateConverter
+from ReferencePointsSelector import TemplateMatchingSelector
+from FrameCapture import EndOfStream
+
+class VideoPipeline:
+    """
+    Потоковая обработка видео: FrameCapture -> поиск шаблона на каждом кадре ->
+    перевод найденных точек в глобальные координаты -> запись результата.
+    Все этапы - генераторы, поэтому память не растёт с длиной видео.
+    """
+    def __init__(self, capture, template, reference_points, selector=None, threshold=None):
+        self.capture = capture
+        self.template = template
+        self.reference_points = reference_points
+        self.selector = selector if selector is not None else TemplateMatchingSelector()
+        self.threshold = threshold
+
+    def frames(self, max_frames=None):
+        """
+        Кадры источника: (номер кадра, кадр). Останавливается в конце видео (EndOfStream),
+        остальные ошибки чтения передаются вызывающему.
+        """
+        frame_index = 0
+        while max_frames is None or frame_index < max_frames:
+            try:
+                frame = self.capture.get_frame()
+            except EndOfStream:
+                return
+            yield frame_index, frame
+            frame_index += 1
+
+    def detections(self, frames):
+        """
+        Найденные на каждом кадре точки: (номер кадра, локальные координаты (N, 2)).
+        Точка - центр найденного шаблона, а не левый верхний угол совпадения,
+        как в TemplateMatches.centers.
+        """
+        th, tw = self.template.shape[:2]
+        center_offset = np.array([tw / 2, th / 2])
+        for frame_index, frame in frames:
+            yield frame_index, self.selector.find_matches(frame, self.template, self.threshold) + center_offset
+
+    def conversions(self, detections):
+        """
+        Перевод точек каждого кадра в глобальные координаты одним пакетным вызовом.
+        """
+        for frame_index, local_coords in detections:
+            if len(local_coords):
+                global_coords = CoordinateConverter.convert_many(self.reference_points, local_coords)
+            else:
+                global_coords = local_coords.reshape(0, 2).astype('float64')
+            yield frame_index, local_coords, global_coords
+
+    def results(self, max_frames=None):
+        return self.conversions(self.detections(self.frames(max_frames)))
+
+    def run(self, sink, max_frames=None):
+        """
+        Прогоняет весь поток через sink. Возвращает количество обработанных кадров.
+        """
+        processed = 0
+        for frame_index, local_coords, global_coords in self.results(max_frames):
+            sink.write(frame_index, local_coords, global_coords)
+            processed += 1
+        return processed
+
+class JsonlSink:
+    """
+    Запись результатов в JSONL: одна строка на кадр.
+    """
+    def __init__(self, file_name):
+        self.file = open(file_name, 'w', encoding='utf-8')
+
+    def write(self, frame_index, local_coords, global_coords):
+        record = {
+            "frame": frame_index,
+            "local_coords": local_coords.tolist(),
+            "global_coords": global_coords.tolist(),
+        }
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class CsvSink:
+    """
+    Запись результатов в CSV: одна строка на найденную точку.
+    """
+    HEADER = ["frame", "local_x", "local_y", "global_x", "global_y"]
+
+    def __init__(self, file_name):
+        self.file = open(file_name, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.HEADER)
+
+    def write(self, frame_index, local_coords, global_coords):
+        self.writer.writerows(
+            [frame_index, lx, ly, gx, gy]
+            for (lx, ly), (gx, gy) in zip(local_coords.tolist(), global_coords.tolist())
+        )
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
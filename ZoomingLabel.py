@@ -1,7 +1,8 @@
 import sys
 from PyQt5.QtWidgets import QApplication, QLabel, QMainWindow
-from PyQt5.QtCore import Qt, QRect, QPoint, pyqtSlot, pyqtSignal
-from PyQt5.QtGui import QPixmap, QPainter
+from PyQt5.QtCore import Qt, QRect, QRectF, QPoint, QTimer, pyqtSlot, pyqtSignal
+from PyQt5.QtGui import QPixmap, QPainter, QColor
+from Instrumentation import Instrumentation, timed
 
 class ZoomingLabel(QLabel):
     clicked_point = pyqtSignal(QPoint)
@@ -14,10 +15,20 @@ class ZoomingLabel(QLabel):
         self.mouse_point = QPoint() 
         self.crop_rect = QRect()
         self.center_crop_rect = QPoint()
+        self.overlay = None
+        self.pyramid = None
+        self.pyramid_scale = 1.0
+        self.is_interacting = False
 
         self.SCALE_MAX = 20.0
         self.SCALE_MIN = 1.0
         self.SCALE_STEP = 0.05
+        self.SMOOTH_DELAY_MS = 150
+
+        # После окончания панорамирования/зума изображение перерисовывается со сглаживанием
+        self.smooth_timer = QTimer(self)
+        self.smooth_timer.setSingleShot(True)
+        self.smooth_timer.timeout.connect(self.end_interaction)
 
     def setPixmap(self, pixmap):
         """
@@ -26,8 +37,29 @@ class ZoomingLabel(QLabel):
         super().setPixmap(pixmap)
         self.crop_rect = pixmap.rect()
         self.center_crop_rect = self.crop_rect.center()
+        self.overlay = None
+        self.pyramid = None
         self.update()
 
+    def setPyramid(self, pyramid, scale):
+        """
+        Устанавливаем пирамиду исходного изображения (ImagePyramid) для отрисовки.
+        scale: Отношение размера pixmap к размеру исходного изображения.
+        Координаты виджета по-прежнему считаются в координатах pixmap.
+        """
+        self.pyramid = pyramid
+        self.pyramid_scale = scale
+        self.update()
+
+    def setOverlay(self, overlay):
+        """
+        Устанавливаем прозрачный слой поверх изображения (того же размера, что и pixmap).
+        Смена слоя не сбрасывает масштаб и положение области просмотра.
+        """
+        self.overlay = overlay
+        self.update()
+
+    @timed("paintEvent")
     def paintEvent(self, event):
         """
         Перерисовываем изображение с учетом масштаба и обрезки.
@@ -37,11 +69,69 @@ class ZoomingLabel(QLabel):
 
         painter = QPainter(self)
 
-        # Рассчитываем область видимости с учетом текущего масштаба
-        scaled_pixmap = self.crop_pixmap()
+        if self.pyramid is not None:
+            self.draw_pyramid(painter)
+        else:
+            # Рассчитываем область видимости с учетом текущего масштаба
+            scaled_pixmap = self.crop_pixmap()
+
+            # Отрисовываем результат
+            painter.drawPixmap(self.rect(), scaled_pixmap)
+
+        # Слой с точками масштабируется при отрисовке той же областью, что и изображение
+        if self.overlay is not None:
+            painter.drawPixmap(self.rect(), self.overlay, self.crop_rect)
+
+        if Instrumentation.overlay:
+            self.draw_timing(painter)
 
-        # Отрисовываем результат
-        painter.drawPixmap(self.rect(), scaled_pixmap)
+    def draw_timing(self, painter):
+        """
+        Статистика замеров в левом верхнем углу (при POINTS_TIMING=overlay).
+        """
+        lines = Instrumentation.overlay_lines()
+        if not lines:
+            return
+        metrics = painter.fontMetrics()
+        height = metrics.height()
+        width = max(metrics.horizontalAdvance(line) for line in lines)
+        painter.fillRect(QRect(0, 0, width + 8, height * len(lines) + 8), QColor(0, 0, 0, 160))
+        painter.setPen(QColor(255, 255, 255))
+        for i, line in enumerate(lines):
+            painter.drawText(4, 4 + metrics.ascent() + i * height, line)
+
+    def draw_pyramid(self, painter):
+        """
+        Отрисовка только видимых тайлов пирамиды на уровне, соответствующем текущему масштабу.
+        """
+        crop_rect = self.update_crop_rect()
+        if crop_rect.isEmpty():
+            return
+
+        sx = self.width() / crop_rect.width()
+        sy = self.height() / crop_rect.height()
+        level = self.pyramid.level_for(max(sx, sy) * self.pyramid_scale)
+
+        # Видимая область в координатах исходного изображения
+        visible = QRectF(crop_rect.x() / self.pyramid_scale, crop_rect.y() / self.pyramid_scale,
+                         crop_rect.width() / self.pyramid_scale, crop_rect.height() / self.pyramid_scale)
+
+        painter.save()
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, not self.is_interacting)
+        painter.scale(sx, sy)
+        painter.translate(-crop_rect.x(), -crop_rect.y())
+        painter.scale(self.pyramid_scale, self.pyramid_scale)
+        for target, tile in self.pyramid.visible_tiles(level, visible):
+            painter.drawPixmap(target, tile, QRectF(tile.rect()))
+        painter.restore()
+
+    def start_interaction(self):
+        self.is_interacting = True
+        self.smooth_timer.start(self.SMOOTH_DELAY_MS)
+
+    def end_interaction(self):
+        self.is_interacting = False
+        self.update()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
@@ -53,7 +143,7 @@ class ZoomingLabel(QLabel):
 
         if event.button() == Qt.RightButton:
             self.is_mouse_pressed = False
-            self.scale_value = self.SCALE_MIN_VALUE
+            self.scale_value = self.SCALE_MIN
 
         self.update()
 
@@ -61,6 +151,7 @@ class ZoomingLabel(QLabel):
         if self.is_mouse_pressed and self.scale_value > 1.0:
             delta = event.pos() - self.mouse_point
             self.move_crop_rect(event.pos(), delta)
+            self.start_interaction()
             self.update()
 
     def mouseReleaseEvent(self, event):
@@ -78,21 +169,30 @@ class ZoomingLabel(QLabel):
 
         # Изменение координат для зумирования в точку под курсором
         self.changeWheelValue(event.pos(), old_scale)
+        self.start_interaction()
         self.update()
 
-    def crop_pixmap(self):
+    def update_crop_rect(self):
+        """
+        Пересчитывает видимую область pixmap с учетом масштаба и центра.
+        """
         crop_size = self.size() / self.scale_value
         self.crop_rect.setSize(crop_size)
 
         # Ограничиваем crop_rect в пределах исходного изображения
         self.crop_rect.moveCenter(self.center_crop_rect)
         self.crop_rect = self.crop_rect.intersected(self.pixmap().rect())
+        return self.crop_rect
+
+    def crop_pixmap(self):
+        crop_rect = self.update_crop_rect()
 
         # Вырезаем часть изображения
-        cropped_pixmap = self.pixmap().copy(self.crop_rect)
+        cropped_pixmap = self.pixmap().copy(crop_rect)
 
-        # Масштабируем вырезанную область до размеров QLabel
-        scaled_pixmap = cropped_pixmap.scaled(self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        # Масштабируем вырезанную область до размеров QLabel, сглаживание - только после окончания взаимодействия
+        transform = Qt.FastTransformation if self.is_interacting else Qt.SmoothTransformation
+        scaled_pixmap = cropped_pixmap.scaled(self.size(), Qt.KeepAspectRatio, transform)
         return scaled_pixmap
 
     def getImageCoordinatesFromMouse(self, mouse_pos):
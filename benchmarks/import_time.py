@@ -0,0 +1,62 @@
+"""
+Время импорта вычислительных модулей в отдельном процессе и признак загрузки PyQt5.
+Для сравнения замеряется тот же импорт вместе с DisplayUtils - так модули
+импортировались, пока зависели от Qt.
+
+    python benchmarks/import_time.py --repeat 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "numpy + cv2": "import numpy, cv2",
+    "Point": "import Point",
+    "CoordinateConverter": "import CoordinateConverter",
+    "ReferencePointsSelector": "import ReferencePointsSelector",
+    "FrameCapture": "import FrameCapture",
+    "cli": "import cli",
+    "ReferencePointsSelector + DisplayUtils (Qt)": "import ReferencePointsSelector, DisplayUtils",
+    "MainWindow (GUI)": "import MainWindow",
+}
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed, 'PyQt5' in sys.modules)
+"""
+
+def measure(statement, repeat):
+    times, qt_loaded = [], False
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(statement=statement)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        times.append(float(output[-2]))
+        qt_loaded = output[-1] == "True"
+    return statistics.median(times), qt_loaded
+
+def run(repeat):
+    return [
+        {"case": name, "seconds": seconds, "qt_loaded": qt_loaded}
+        for name, (seconds, qt_loaded) in ((name, measure(statement, repeat)) for name, statement in CASES.items())
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'module':<45} {'median, ms':>10} {'PyQt5':>6}")
+    for row in run(args.repeat):
+        print(f"{row['case']:<45} {row['seconds'] * 1000:>10.1f} {'yes' if row['qt_loaded'] else 'no':>6}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Сравнение cv2.matchTemplate и FFT-корреляции для разных размеров шаблона.
+Показывает, становится ли FFT быстрее с ростом доли площади изображения под шаблоном.
+По умолчанию используется cv2.matchTemplate: на прошлых замерах FFT не был быстрее ни при одной доле.
+
+    python benchmarks/matching_backends.py --image 1280x720 --image 1920x1080 --gray
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MatchingBackend import SpatialMatchingBackend, FFTMatchingBackend
+from synthetic import synthetic_image
+
+RATIOS = (0.001, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5)
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def run(sizes, gray, repeat):
+    spatial, fft = SpatialMatchingBackend(), FFTMatchingBackend()
+    rows = []
+    for width, height in sizes:
+        image = synthetic_image(width, height, gray)
+        for ratio in RATIOS:
+            side = max(4, int(round((ratio * width * height) ** 0.5)))
+            if side >= min(width, height):
+                continue
+            template = image[:side, :side].copy()
+            rows.append({
+                "image": f"{width}x{height}",
+                "template": side,
+                "ratio": ratio,
+                "spatial": best_time(lambda: spatial.match(image, template), repeat),
+                "fft": best_time(lambda: fft.match(image, template), repeat),
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", action="append", default=None, help="размер изображения WxH")
+    parser.add_argument("--gray", action="store_true", help="одноканальные изображения")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sizes = [tuple(int(v) for v in size.split("x")) for size in (args.image or ["1280x720", "1920x1080"])]
+    rows = run(sizes, args.gray, args.repeat)
+
+    print(f"{'image':>10} {'template':>8} {'ratio':>7} {'spatial, s':>11} {'fft, s':>9}")
+    for row in rows:
+        print(f"{row['image']:>10} {row['template']:>8} {row['ratio']:>7} {row['spatial']:>11.4f} {row['fft']:>9.4f}")
+
+    # Точка переключения - наименьшая доля, начиная с которой FFT быстрее на всех больших долях
+    for size in dict.fromkeys(row["image"] for row in rows):
+        crossover = "нет"
+        for row in reversed([row for row in rows if row["image"] == size]):
+            if row["fft"] >= row["spatial"]:
+                break
+            crossover = row["ratio"]
+        print(f"{size}: FFT быстрее начиная с доли площади {crossover}")
+
+if __name__ == "__main__":
+    main()
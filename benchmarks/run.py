@@ -0,0 +1,267 @@
+"""
+Набор замеров горячих путей: перевод координат, поиск по шаблону, подготовка изображения
+для Qt и отрисовка ZoomingLabel. Qt запускается с платформой offscreen.
+Результат сохраняется в JSON; с --baseline замеры сравниваются с прошлым результатом,
+и при замедлении больше допуска скрипт завершается с кодом 1.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --suite conversion --suite matching --quick --baseline results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Point import Point
+from CoordinateConverter import CoordinateConverter
+from ReferencePointsSelector import TemplateMatchingSelector
+from synthetic import synthetic_image, synthetic_scene, synthetic_points, synthetic_targets
+
+def measure(function, repeat, warmup=1):
+    """
+    Время выполнения function в секундах: минимум, медиана и среднее по repeat запускам.
+    """
+    for _ in range(warmup):
+        function()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"min": min(times), "median": statistics.median(times), "mean": statistics.fmean(times), "repeat": repeat}
+
+def conversion_suite(repeat, quick):
+    """
+    convert_to_global и simple_linear_transformation при 4 - 10 000 реперных точек:
+    подбор гомографии, перевод одной точки по готовой гомографии и пакетный перевод.
+    """
+    rows = []
+    targets, _ = synthetic_targets(1000 if quick else 10000)
+    target = Point(local_coords=tuple(targets[0]))
+    for count in (4, 100, 1000) if quick else (4, 100, 1000, 10000):
+        points = synthetic_points(count, noise=0.01)
+
+        def fit():
+            CoordinateConverter.invalidate()
+            CoordinateConverter.convert_to_global(points, target)
+
+        CoordinateConverter.invalidate()
+        cases = {
+            "convert_to_global (fit)": fit,
+            "convert_to_global (cached)": lambda: CoordinateConverter.convert_to_global(points, target),
+            f"convert_many ({len(targets)} targets)": lambda: CoordinateConverter.convert_many(points, targets),
+            "simple_linear_transformation": lambda: CoordinateConverter.simple_linear_transformation(points, target),
+            f"simple_linear_many ({len(targets)} targets)": lambda: CoordinateConverter.simple_linear_many(points, targets),
+        }
+        for case, function in cases.items():
+            rows.append({"case": case, "points": count, **measure(function, repeat)})
+    CoordinateConverter.invalidate()
+    return rows
+
+def matching_suite(repeat, quick):
+    """
+    TemplateMatchingSelector.select_points для разных размеров изображения и шаблона,
+    с поиском в полном разрешении и по пирамиде.
+    """
+    rows = []
+    sizes = ((640, 480), (1920, 1080)) if quick else ((640, 480), (1920, 1080), (3840, 2160))
+    for width, height in sizes:
+        for template_size in (16, 32, 64):
+            image, template, positions = synthetic_scene(width, height, template_size, count=20)
+            for pyramid_levels in (0, 3):
+                selector = TemplateMatchingSelector(pyramid_levels=pyramid_levels)
+
+                def select():
+                    selector.points.clear()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        return selector.select_points(image, template)
+
+                timing = measure(select, repeat)
+                rows.append({
+                    "case": "select_points",
+                    "image": f"{width}x{height}",
+                    "template": template_size,
+                    "pyramid_levels": pyramid_levels,
+                    "expected": len(positions),
+                    "found": len(select()),
+                    **timing,
+                })
+    return rows
+
+def get_application():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+def display_suite(repeat, quick):
+    """
+    DisplayUtils.from_cv_to_qimg и get_scaled_pixmap для изображений разного размера.
+    """
+    app = get_application()
+    from DisplayUtils import DisplayUtils
+
+    rows = []
+    sizes = ((1280, 720), (1920, 1080)) if quick else ((1280, 720), (1920, 1080), (3840, 2160), (7680, 4320))
+    for width, height in sizes:
+        image = synthetic_image(width, height)
+        qimage = DisplayUtils.from_cv_to_qimg(image)
+        cases = {
+            "from_cv_to_qimg": lambda: DisplayUtils.from_cv_to_qimg(image),
+            "get_scaled_pixmap": lambda: DisplayUtils.get_scaled_pixmap(qimage, max_width=1280, max_height=720),
+        }
+        for case, function in cases.items():
+            rows.append({"case": case, "image": f"{width}x{height}", **measure(function, repeat)})
+    return rows
+
+def zoom_suite(repeat, quick):
+    """
+    ZoomingLabel: crop_pixmap при быстрой и сглаженной отрисовке и полная отрисовка виджета
+    (paintEvent через grab) с пирамидой исходного изображения и без неё.
+    """
+    app = get_application()
+    from DisplayUtils import DisplayUtils
+    from ZoomingLabel import ZoomingLabel
+    from ImagePyramid import ImagePyramid
+
+    rows = []
+    sizes = ((1920, 1080),) if quick else ((1920, 1080), (3840, 2160), (7680, 4320))
+    for width, height in sizes:
+        image = synthetic_image(width, height)
+        pixmap, scale_factor = DisplayUtils.get_scaled_pixmap(DisplayUtils.from_cv_to_qimg(image), 1280, 720)
+        pyramid = ImagePyramid(image)
+
+        label = ZoomingLabel()
+        label.resize(1280, 720)
+        for scale in (1.0, 4.0):
+            label.setPixmap(pixmap)
+            label.scale_value = scale
+            for interacting in (True, False):
+                label.is_interacting = interacting
+                mode = "fast" if interacting else "smooth"
+                rows.append({"case": f"crop_pixmap ({mode})", "image": f"{width}x{height}", "scale": scale,
+                             **measure(label.crop_pixmap, repeat)})
+                rows.append({"case": f"paint ({mode})", "image": f"{width}x{height}", "scale": scale,
+                             **measure(label.grab, repeat)})
+
+            label.setPyramid(pyramid, scale_factor)
+            label.is_interacting = False
+            rows.append({"case": "paint (pyramid)", "image": f"{width}x{height}", "scale": scale,
+                         **measure(label.grab, repeat)})
+        label.deleteLater()
+    return rows
+
+def backends_suite(repeat, quick):
+    """
+    Сравнение cv2.matchTemplate и FFT-корреляции (benchmarks/matching_backends.py).
+    """
+    import matching_backends
+    sizes = ((640, 480),) if quick else ((1280, 720), (1920, 1080))
+    rows = []
+    for row in matching_backends.run(sizes, gray=False, repeat=repeat):
+        for backend in ("spatial", "fft"):
+            rows.append({"case": f"match ({backend})", "image": row["image"], "template": row["template"],
+                         "min": row[backend], "repeat": repeat})
+    return rows
+
+def import_suite(repeat, quick):
+    """
+    Время импорта модулей в отдельном процессе (benchmarks/import_time.py).
+    """
+    import import_time
+    return [{"case": f"import {row['case']}", "qt_loaded": row["qt_loaded"], "median": row["seconds"], "repeat": repeat}
+            for row in import_time.run(repeat)]
+
+SUITES = {
+    "conversion": conversion_suite,
+    "matching": matching_suite,
+    "display": display_suite,
+    "zoom": zoom_suite,
+    "backends": backends_suite,
+    "import": import_suite,
+}
+DEFAULT_SUITES = ("conversion", "matching", "display", "zoom")
+
+def environment():
+    return {
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+    }
+
+def case_key(suite, row):
+    """
+    Ключ замера для сравнения с прошлым результатом: набор и все параметры, кроме времени.
+    """
+    params = {k: v for k, v in row.items() if k not in ("min", "median", "mean", "repeat", "found", "qt_loaded")}
+    return suite, json.dumps(params, sort_keys=True, ensure_ascii=False)
+
+def compare(results, baseline, tolerance):
+    """
+    Замеры, медиана которых выросла относительно baseline больше чем в (1 + tolerance) раз.
+    """
+    old = {case_key(suite, row): row for suite, rows in baseline["results"].items() for row in rows}
+    regressions = []
+    for suite, rows in results.items():
+        for row in rows:
+            previous = old.get(case_key(suite, row))
+            if previous is None:
+                continue
+            before = previous.get("median", previous.get("min"))
+            after = row.get("median", row.get("min"))
+            if before and after > before * (1 + tolerance):
+                regressions.append((suite, row, before, after))
+    return regressions
+
+def describe(row):
+    return ", ".join(f"{k}={v}" for k, v in row.items() if k not in ("min", "median", "mean", "repeat"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), default=None,
+                        help=f"набор замеров (по умолчанию {', '.join(DEFAULT_SUITES)})")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="только малые размеры")
+    parser.add_argument("--output", default=None, help="файл JSON для результатов")
+    parser.add_argument("--baseline", default=None, help="JSON прошлого запуска для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое замедление относительно baseline")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for suite in args.suite or DEFAULT_SUITES:
+        print(f"[{suite}]", file=sys.stderr)
+        results[suite] = SUITES[suite](args.repeat, args.quick)
+        for row in results[suite]:
+            seconds = row.get("median", row.get("min"))
+            print(f"  {seconds * 1000:10.3f} ms  {describe(row)}", file=sys.stderr)
+
+    report = {"environment": environment(), "quick": args.quick, "results": results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as json_file:
+            json.dump(report, json_file, indent=4, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as json_file:
+            baseline = json.load(json_file)
+        regressions = compare(results, baseline, args.tolerance)
+        for suite, row, before, after in regressions:
+            print(f"Замедление [{suite}] {describe(row)}: {before * 1000:.3f} -> {after * 1000:.3f} ms", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Синтетические данные для замеров: изображения, сцены с известным положением шаблона
+и наборы реперных точек с известной гомографией. Все генераторы детерминированы по seed.
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Point import PointSet
+
+# Гомография "изображение -> поле", по которой строятся глобальные координаты точек
+HOMOGRAPHY = np.array([
+    [0.05, 0.004, 10.0],
+    [0.002, 0.07, 20.0],
+    [0.00001, 0.00002, 1.0],
+])
+
+def synthetic_image(width, height, gray=False, seed=0):
+    rng = np.random.default_rng(seed)
+    image = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (7, 7), 0)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if gray else image
+
+def synthetic_scene(width, height, template_size, count, gray=False, seed=0):
+    """
+    Изображение с count копиями шаблона на сетке без перекрытий.
+    Возвращает изображение, шаблон и координаты левых верхних углов копий (N, 2).
+    """
+    image = synthetic_image(width, height, gray, seed)
+    template = synthetic_image(template_size, template_size, gray, seed + 1)
+
+    step = 2 * template_size
+    cells = [(x, y) for y in range(0, height - template_size, step) for x in range(0, width - template_size, step)]
+    rng = np.random.default_rng(seed)
+    chosen = rng.choice(len(cells), size=min(count, len(cells)), replace=False)
+    positions = np.array([cells[i] for i in sorted(chosen)], dtype=np.float64).reshape(-1, 2)
+    for x, y in positions.astype(int):
+        image[y:y + template_size, x:x + template_size] = template
+    return image, template, positions
+
+def synthetic_points(count, width=1920, height=1080, noise=0.0, seed=0):
+    """
+    Набор из count реперных точек, равномерно распределённых по изображению, с глобальными
+    координатами по HOMOGRAPHY и гауссовым шумом noise (в единицах глобальных координат).
+    """
+    rng = np.random.default_rng(seed)
+    local_coords = rng.uniform((0, 0), (width, height), size=(count, 2))
+    global_coords = cv2.perspectiveTransform(local_coords.reshape(-1, 1, 2), HOMOGRAPHY).reshape(-1, 2)
+    if noise:
+        global_coords += rng.normal(0, noise, size=global_coords.shape)
+    return PointSet.from_arrays(local_coords, global_coords)
+
+def synthetic_targets(count, width=1920, height=1080, seed=1):
+    """
+    Локальные координаты искомых точек (N, 2) и их точные глобальные координаты.
+    """
+    rng = np.random.default_rng(seed)
+    local_coords = rng.uniform((0, 0), (width, height), size=(count, 2))
+    global_coords = cv2.perspectiveTransform(local_coords.reshape(-1, 1, 2), HOMOGRAPHY).reshape(-1, 2)
+    return local_coords, global_coords
@@ -0,0 +1,157 @@
+"""
+Пакетный режим без графического интерфейса: поиск шаблона на изображении или видео
+и перевод центров найденных шаблонов в глобальные координаты по сохранённым реперным точкам.
+Qt не импортируется.
+
+    python cli.py --points points.json --input video.mp4 --template marker.png --output result.jsonl
+
+Проверка калибровки по контрольным точкам с известными глобальными координатами:
+
+    python cli.py --points calibration.npz --checkpoints checkpoints.csv --output report.json
+
+Перекрёстная проверка реперных точек (loo - без каждой точки, число - k групп):
+
+    python cli.py --points points.json --cross-validate loo --output residuals.csv
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import cv2
+from Point import PointSet
+from CalibrationStore import Calibration
+from FrameCapture import ImageFrameCapture, OpenCVFrameCapture, ThreadedFrameCapture, MemmapFrameCapture
+from ReferencePointsSelector import TemplateMatchingSelector
+from VideoPipeline import VideoPipeline, JsonlSink, CsvSink
+from AccuracyEvaluator import AccuracyEvaluator
+from CrossValidation import CrossValidator
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", required=True, help="JSON с реперными точками или файл калибровки .npz")
+    parser.add_argument("--camera-id", default=None, help="идентификатор камеры для проверки калибровки")
+    parser.add_argument("--input", help="изображение или видео")
+    parser.add_argument("--template", help="изображение шаблона")
+    parser.add_argument("--output", help="файл результата (.jsonl или .csv; для --checkpoints .json или .csv)")
+    parser.add_argument("--checkpoints", default=None,
+                        help="CSV или JSON контрольных точек: вместо поиска шаблона проверить точность калибровки")
+    parser.add_argument("--cross-validate", default=None, metavar="loo|K",
+                        help="перекрёстная проверка реперных точек: loo или число групп")
+    parser.add_argument("--linear", action="store_true", help="при проверке использовать линейное преобразование")
+    parser.add_argument("--threshold", type=float, default=0.8, help="порог совпадения шаблона")
+    parser.add_argument("--pyramid-levels", type=int, default=3, help="число уровней пирамиды при поиске шаблона")
+    parser.add_argument("--workers", type=int, default=None, help="число потоков для поиска шаблона")
+    parser.add_argument("--max-frames", type=int, default=None, help="обработать не больше указанного числа кадров")
+    parser.add_argument("--threaded", action="store_true", help="декодировать видео в фоновом потоке")
+    parser.add_argument("--raw-frames", default=None,
+                        help="файл несжатых кадров: создаётся при первом запуске, при следующих видео не декодируется")
+    args = parser.parse_args(argv)
+    if args.checkpoints is None and args.cross_validate is None and not (args.input and args.template and args.output):
+        parser.error("нужны --input, --template и --output (или --checkpoints, --cross-validate)")
+    if args.cross_validate is not None and args.cross_validate != "loo" and not args.cross_validate.isdigit():
+        parser.error("--cross-validate: ожидается loo или число групп")
+    return args
+
+def open_capture(file_name, threaded=False, raw_file=None, max_frames=None):
+    """
+    Источник кадров и ограничение числа кадров (изображение - один кадр).
+    raw_file: Файл MemmapFrameCapture; если его нет или он сделан из другого видео
+              (либо из неполного), видео декодируется в него заново (не больше max_frames кадров).
+    """
+    if cv2.haveImageReader(file_name):
+        return ImageFrameCapture(file_name), 1
+
+    if raw_file is not None:
+        if MemmapFrameCapture.is_current(raw_file, file_name, max_frames):
+            return MemmapFrameCapture(raw_file, source=file_name), None
+        capture = OpenCVFrameCapture(file_name)
+        try:
+            return MemmapFrameCapture.dump(capture, raw_file, max_frames, source=file_name), None
+        finally:
+            capture.release()
+
+    capture = OpenCVFrameCapture(file_name)
+    if threaded:
+        capture = ThreadedFrameCapture(capture, policy=ThreadedFrameCapture.EVERY)
+    return capture, None
+
+def load_reference_points(file_name, camera_id=None):
+    """
+    Реперные точки из JSON или из файла калибровки (тогда гомография не подбирается заново).
+    """
+    if os.path.splitext(file_name)[1].lower() != ".npz":
+        return PointSet.load_json(file_name)
+
+    calibration = Calibration.load(file_name)
+    calibration.check_camera(camera_id)
+    if camera_id is not None and calibration.camera_id is None:
+        print(f"В {file_name} не указана камера, соответствие камере {camera_id} не проверено", file=sys.stderr)
+    if not calibration.is_current():
+        print(f"Гомография в {file_name} не соответствует точкам и будет пересчитана", file=sys.stderr)
+    calibration.activate()
+    return calibration.reference_points
+
+def open_sink(file_name):
+    if os.path.splitext(file_name)[1].lower() == ".csv":
+        return CsvSink(file_name)
+    return JsonlSink(file_name)
+
+def evaluate_checkpoints(reference_points, args):
+    """
+    Проверка калибровки по контрольным точкам: сводка печатается, отчёт сохраняется в --output.
+    """
+    method = AccuracyEvaluator.LINEAR if args.linear else AccuracyEvaluator.HOMOGRAPHY
+    report = AccuracyEvaluator(reference_points, method).evaluate_file(args.checkpoints)
+    return write_report(report, args.output)
+
+def cross_validate(reference_points, args):
+    """
+    Перекрёстная проверка реперных точек: остатки по каждой точке сохраняются в --output.
+    """
+    method = CrossValidator.LINEAR if args.linear else CrossValidator.HOMOGRAPHY
+    validator = CrossValidator(reference_points, method, args.workers)
+    if args.cross_validate == "loo":
+        report = validator.leave_one_out()
+    else:
+        report = validator.k_fold(int(args.cross_validate))
+    return write_report(report, args.output)
+
+def write_report(report, file_name):
+    if file_name:
+        report.save(file_name)
+    print(json.dumps(report.summary(), indent=4, ensure_ascii=False))
+    return 0
+
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+
+    reference_points = load_reference_points(args.points, args.camera_id)
+    if args.checkpoints is not None:
+        return evaluate_checkpoints(reference_points, args)
+    if args.cross_validate is not None:
+        return cross_validate(reference_points, args)
+    template = cv2.imread(args.template)
+    if template is None:
+        raise Exception(f"Не удалось загрузить шаблон по пути: {args.template}")
+
+    capture, max_frames = open_capture(args.input, args.threaded, args.raw_frames, args.max_frames)
+    if args.max_frames is not None:
+        max_frames = args.max_frames if max_frames is None else min(max_frames, args.max_frames)
+
+    selector = TemplateMatchingSelector(threshold=args.threshold, pyramid_levels=args.pyramid_levels, workers=args.workers)
+    pipeline = VideoPipeline(capture, template, reference_points, selector)
+
+    try:
+        with open_sink(args.output) as sink:
+            frames = pipeline.run(sink, max_frames)
+    finally:
+        capture.release()
+
+    elapsed = time.perf_counter() - start
+    print(f"Обработано кадров: {frames} за {elapsed:.2f} с", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AnalyticsLog import AnalyticsLog
+
+def write_legacy(directory, stamp):
+    ref_points = [{"local_coords": list(local), "global_coords": list(known)}
+                  for local, known in (((0, 0), (0, 0)), ((100, 0), (1, 0)), ((0, 100), (0, 1)), ((100, 100), (1, 1)))]
+    data = {
+        "ref_points": ref_points,
+        "target_point": {"local_coords": [50, 50], "global_coords": [0.5, 0.5]},
+        "calculate_target_point": {"global_coords": [0.51, 0.5]},
+        "deviation": 0.01,
+        "width_pixel": 0.01,
+        "deviation_to_pixel_ratio": 1.0,
+    }
+    with open(os.path.join(directory, f"analysis_{stamp}.json"), 'w', encoding='utf-8') as json_file:
+        json.dump(data, json_file)
+
+def test_import_legacy_is_idempotent(tmp_path):
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    write_legacy(legacy, "20240101_120000")
+    log = AnalyticsLog(str(tmp_path / "logs"))
+
+    assert log.import_legacy(str(legacy)) == 1
+    assert log.import_legacy(str(legacy)) == 0
+    write_legacy(legacy, "20240102_120000")
+    assert log.import_legacy(str(legacy)) == 1
+    assert len(log.read()) == 2
@@ -0,0 +1,22 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Point import PointSet
+from CalibrationStore import Calibration
+from cli import load_reference_points
+
+def make_points():
+    return PointSet.from_arrays([(0, 0), (100, 0), (0, 100), (100, 100), (50, 40)],
+                                [(0, 0), (1, 0), (0, 1), (1, 1), (0.5, 0.4)])
+
+def test_camera_mismatch_is_error(tmp_path):
+    file_name = str(tmp_path / "calibration.npz")
+    Calibration.from_points(make_points(), camera_id="cam-1").save(file_name)
+
+    assert Calibration.load(file_name).camera_id == "cam-1"
+    assert len(load_reference_points(file_name, "cam-1")) == 5
+    with pytest.raises(ValueError):
+        load_reference_points(file_name, "cam-2")
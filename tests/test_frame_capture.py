@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from FrameCapture import FrameCapture, OpenCVFrameCapture, ThreadedFrameCapture, MemmapFrameCapture, EndOfStream
+
+class CounterCapture(FrameCapture):
+    """
+    Источник кадров, заполненных номером кадра.
+    """
+    def __init__(self, shape=(64, 64, 3), count=None, fps=25.0):
+        self.shape = shape
+        self.count = count
+        self.fps = fps
+        self.index = 0
+
+    def get_frame(self):
+        if self.count is not None and self.index >= self.count:
+            raise EndOfStream("Кадры закончились")
+        self.index += 1
+        return np.full(self.shape, self.index % 256, dtype=np.uint8)
+
+    def release(self):
+        pass
+
+    def is_opened(self):
+        return True
+
+    def configure(self, **kwargs):
+        pass
+
+def check_held_frames_unchanged(policy):
+    capture = ThreadedFrameCapture(CounterCapture(), buffer_size=3, policy=policy, timeout=5)
+    try:
+        for _ in range(50):
+            frame = capture.get_frame()
+            held = frame.copy()
+            time.sleep(0.002)
+            assert np.array_equal(frame, held)
+    finally:
+        capture.release()
+
+def test_latest_policy_keeps_held_frame():
+    check_held_frames_unchanged(ThreadedFrameCapture.LATEST)
+
+def test_every_policy_keeps_held_frame():
+    check_held_frames_unchanged(ThreadedFrameCapture.EVERY)
+
+def make_source(tmp_path, name, content):
+    source = tmp_path / name
+    source.write_bytes(content)
+    return str(source)
+
+def test_memmap_dump_checks_source(tmp_path):
+    source = make_source(tmp_path, "a.mp4", b"video a")
+    other = make_source(tmp_path, "b.mp4", b"video b")
+    raw_file = str(tmp_path / "frames.raw")
+
+    capture = MemmapFrameCapture.dump(CounterCapture(count=5), raw_file, source=source)
+    assert capture.frame_count == 5 and capture.complete
+    capture.release()
+    assert MemmapFrameCapture.is_current(raw_file, source)
+    assert not MemmapFrameCapture.is_current(raw_file, other)
+    with pytest.raises(Exception):
+        MemmapFrameCapture(raw_file, source=other)
+
+    os.utime(source, (0, 0))
+    assert not MemmapFrameCapture.is_current(raw_file, source)
+
+def test_memmap_dump_max_frames_and_fps(tmp_path):
+    source = make_source(tmp_path, "a.mp4", b"video")
+    raw_file = str(tmp_path / "frames.raw")
+
+    capture = MemmapFrameCapture.dump(CounterCapture(fps=25.0), raw_file, max_frames=3, fps=10.0, source=source)
+    assert capture.frame_count == 3 and not capture.complete
+    assert capture.fps == 10.0
+    capture.release()
+    assert MemmapFrameCapture.is_current(raw_file, source, max_frames=3)
+    assert not MemmapFrameCapture.is_current(raw_file, source, max_frames=4)
+    assert not MemmapFrameCapture.is_current(raw_file, source)
+
+def test_memmap_failed_dump_keeps_previous_file(tmp_path):
+    source = make_source(tmp_path, "a.mp4", b"video")
+    raw_file = str(tmp_path / "frames.raw")
+    MemmapFrameCapture.dump(CounterCapture(count=2), raw_file, source=source).release()
+
+    class BrokenCapture(CounterCapture):
+        def get_frame(self):
+            if self.index == 1:
+                raise IOError("Ошибка чтения")
+            return super().get_frame()
+
+    with pytest.raises(IOError):
+        MemmapFrameCapture.dump(BrokenCapture(), raw_file, source=source)
+    assert sorted(os.listdir(tmp_path)) == ["a.mp4", "frames.raw"]
+    capture = MemmapFrameCapture(raw_file, source=source)
+    assert capture.frame_count == 2
+    assert int(capture.get_frame_at(1)[0, 0, 0]) == 2
+
+def make_video(tmp_path, count=12):
+    """
+    Видео из кадров, заполненных значением 20 * номер кадра.
+    """
+    file_name = str(tmp_path / "video.avi")
+    writer = cv2.VideoWriter(file_name, cv2.VideoWriter_fourcc(*"MJPG"), 10, (32, 32))
+    for index in range(count):
+        writer.write(np.full((32, 32, 3), 20 * index, dtype=np.uint8))
+    writer.release()
+    return file_name
+
+def frame_number(frame):
+    return int(round(float(frame.mean()) / 20))
+
+def test_opencv_sequential_read_skips_cache(tmp_path):
+    capture = OpenCVFrameCapture(make_video(tmp_path))
+    try:
+        frames = []
+        while True:
+            try:
+                frames.append(frame_number(capture.get_frame()))
+            except EndOfStream:
+                break
+        assert frames == list(range(12))
+        assert capture.cached_bytes == 0
+
+        assert frame_number(capture.get_frame_at(3)) == 3
+        assert frame_number(capture.get_frame()) == 4
+        capture.seek(9)
+        assert frame_number(capture.get_frame()) == 9
+        assert list(capture.cache) == [3]
+    finally:
+        capture.release()
@@ -0,0 +1,20 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Point import Point, PointSet
+
+def test_clear_does_not_leak_global_coords():
+    points = PointSet.from_arrays([[1, 2]], [[10, 20]])
+    points.clear()
+    points._append_arrays(np.array([[3.0, 4.0]]))
+    assert not points.has_global().any()
+
+def test_append_after_clear_has_no_global():
+    points = PointSet.from_arrays([[1, 2]], [[10, 20]])
+    points.clear()
+    point = points.append(Point(local_coords=(3, 4)))
+    assert point.global_coords is None
+    assert points.reference_arrays()[0].shape == (0, 2)
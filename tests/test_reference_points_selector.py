@@ -0,0 +1,22 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ReferencePointsSelector import TemplateMatchingSelector
+
+def peaks_at(xs, radius):
+    result = np.zeros((100, 300), dtype=np.float32)
+    result[50, xs] = 1.0
+    coords, _ = TemplateMatchingSelector.extract_peaks(result, 0.8, radius)
+    return sorted(coords[:, 0].tolist())
+
+def test_equal_peaks_farther_than_radius_are_kept():
+    assert peaks_at([50, 91], 40) == [50, 91]
+    assert peaks_at([50, 91, 132], 40) == [50, 91, 132]
+    assert peaks_at([50, 92], 41) == [50, 92]
+
+def test_equal_peaks_within_radius_are_merged():
+    assert peaks_at([50, 90], 40) == [50]
+    assert peaks_at([50, 91], 41) == [50]
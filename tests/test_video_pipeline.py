@@ -0,0 +1,56 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FrameCapture import FrameCapture, EndOfStream
+from VideoPipeline import VideoPipeline
+
+class ListCapture(FrameCapture):
+    """
+    Источник, отдающий кадры из списка; элемент-исключение выбрасывается при чтении.
+    """
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def get_frame(self):
+        if not self.frames:
+            raise EndOfStream("Кадры закончились")
+        frame = self.frames.pop(0)
+        if isinstance(frame, Exception):
+            raise frame
+        return frame
+
+    def release(self):
+        pass
+
+    def is_opened(self):
+        return bool(self.frames)
+
+    def configure(self, **kwargs):
+        pass
+
+def frame():
+    return np.zeros((8, 8, 3), dtype=np.uint8)
+
+def test_frames_stop_at_end_of_stream():
+    pipeline = VideoPipeline(ListCapture([frame(), frame()]), template=None, reference_points=None)
+    assert [index for index, _ in pipeline.frames()] == [0, 1]
+
+def test_frames_propagate_read_errors():
+    pipeline = VideoPipeline(ListCapture([frame(), Exception("Ошибка декодирования")]), template=None, reference_points=None)
+    frames = pipeline.frames()
+    next(frames)
+    with pytest.raises(Exception, match="Ошибка декодирования"):
+        next(frames)
+
+def test_detections_report_template_centers():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (120, 160, 3), dtype=np.uint8)
+    template = image[30:50, 70:86].copy()
+    pipeline = VideoPipeline(ListCapture([image]), template, reference_points=None)
+    [(index, local_coords)] = list(pipeline.detections(pipeline.frames()))
+    assert index == 0
+    assert local_coords.tolist() == [[70 + 8, 30 + 10]]